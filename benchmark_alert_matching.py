@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark alert recipient matching: the old per-flip scan of every premium user
+vs the run-wide SubscriptionIndex.
+
+Simulates premium users with random areas/languages in an in-memory data store
+(no Firestore or Twilio needed), runs the same status flips through both
+matchers, and checks they pick the same recipients.
+
+Usage: python benchmark_alert_matching.py [--users 100000] [--flips 200] [--seed 1]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scraper'))
+
+from datastore import MemoryStore
+from subscription_index import SubscriptionIndex
+
+CITIES = ["Toronto", "North York", "Scarborough", "Etobicoke", "Mississauga", "Brampton", "Markham",
+          "Richmond Hill", "Vaughan", "Oakville", "Burlington", "Hamilton", "Ottawa", "Kanata", "London",
+          "Kitchener", "Waterloo", "Guelph", "Barrie", "Oshawa", "Whitby", "Kingston", "Windsor", "Sudbury"]
+WILDCARDS = ["Ontario Wide", "All Locations"]
+LANGUAGES = ["English", "French", "Cantonese", "Mandarin", "Japanese", "Korean", "Punjabi", "Hindi",
+             "Spanish", "Arabic", "Tamil", "Portuguese"]
+
+
+def simulate_users(count, rng):
+    users = {}
+    for i in range(count):
+        areas = rng.sample(CITIES, rng.choice([0, 1, 1, 1, 2, 3]))
+        if rng.random() < 0.05:
+            areas.append(rng.choice(WILDCARDS))
+        users[f"user_{i:06d}"] = {
+            "isPremium": True,
+            "phoneNumber": f"+1416{i:07d}" if rng.random() < 0.95 else None,
+            "areas": areas,
+            "languages": rng.sample(LANGUAGES, rng.choice([0, 1, 1, 2, 3])),
+        }
+    return users
+
+
+def simulate_flips(count, rng):
+    cities = CITIES + ["Ontario Wide", "Toronto (Downtown)", "Unknown"]
+    return [(rng.choice(cities), rng.sample(LANGUAGES, rng.choice([0, 1, 2, 3]))) for _ in range(count)]
+
+
+async def scan_recipients(store, clinic_city, clinic_languages):
+    """The matching send_alert_batch did before the index: every premium user, every flip."""
+    recipients = []
+    async for user_id, user_data in store.users.premium():
+        user_areas = user_data.get('areas', [])
+        user_languages = user_data.get('languages', [])
+        user_phone = user_data.get('phoneNumber')
+        if not user_phone:
+            continue
+        location_match = False
+        for area in user_areas:
+            if (area.lower() == clinic_city.lower() or
+                'ontario wide' in area.lower() or
+                'all locations' in area.lower() or
+                'ontario wide' in clinic_city.lower() or
+                clinic_city.lower() in area.lower() or
+                area.lower() in clinic_city.lower()):
+                location_match = True
+                break
+        if not location_match:
+            continue
+        if user_languages and clinic_languages:
+            if not any(any(u.lower() in c.lower() for c in clinic_languages) for u in user_languages):
+                continue
+        recipients.append((user_id, user_phone))
+    return recipients
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--flips", type=int, default=200)
+    parser.add_argument("--scan-flips", type=int, default=20, help="Flips timed on the (slow) scan path")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    store = MemoryStore({"users": simulate_users(args.users, rng)})
+    flips = simulate_flips(args.flips, rng)
+    print(f"📋 {args.users} simulated premium users, {args.flips} flips\n")
+
+    started = time.perf_counter()
+    index = await SubscriptionIndex(store).load()
+    build = time.perf_counter() - started
+    print(f"🏗️  Index built in {build:.2f}s")
+
+    started = time.perf_counter()
+    indexed = [index.recipients(city, langs) for city, langs in flips]
+    per_flip = (time.perf_counter() - started) / len(flips)
+    print(f"⚡ Index:  {1000 * per_flip:8.2f} ms/flip")
+
+    scan_flips = flips[:args.scan_flips]
+    started = time.perf_counter()
+    scanned = [await scan_recipients(store, city, langs) for city, langs in scan_flips]
+    scan_per_flip = (time.perf_counter() - started) / len(scan_flips)
+    print(f"🐢 Scan:   {1000 * scan_per_flip:8.2f} ms/flip ({len(scan_flips)} flips, "
+          f"in-memory reads; Firestore adds network time per user)")
+
+    agreed = sum(a == b for a, b in zip(indexed, scanned))
+    print(f"\n🤝 Same recipients on {agreed}/{len(scan_flips)} flips")
+    print(f"📈 {scan_per_flip / per_flip:.0f}x faster per flip; the index pays for itself after "
+          f"{build / max(scan_per_flip - per_flip, 1e-9):.1f} flip(s)")
+    index.print_stats()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
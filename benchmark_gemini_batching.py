@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-clinic vs batched Gemini analysis.
+
+Rebuilds each seed clinic's crawl text (main page plus its cached sub-pages)
+from the scraper's HTTP validator cache (run the scraper once first), reduces
+it the same way the scraper does, and analyzes the same clinics both ways with
+the LLM cache disabled. Both modes use the strongest routed model, so they
+differ only in batching.
+
+Usage: python benchmark_gemini_batching.py [--clinics 40] [--batch-size 8] [--concurrency 8]
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scraper'))
+
+import main as scraper
+from batch_analyzer import BatchAnalyzer
+from cache_store import cache_path
+from text_reduction import TextReducer, estimate_tokens
+
+
+def load_texts(limit):
+    """[(clinic_id, reduced text)] for seed clinics whose main page is cached, combined like crawl_clinic_static."""
+    path = cache_path("http_validators.sqlite3")
+    if not os.path.exists(path):
+        return []
+    conn = sqlite3.connect(path)
+    pages = {url: (text, json.loads(links or "[]"))
+             for url, text, links in conn.execute("SELECT url, text, links FROM validators WHERE length(text) > 0")}
+    conn.close()
+    with open(os.environ.get("SEED_FILE", "clinic_seed.csv"), 'r', encoding='utf-8') as f:
+        seeds = [(row.get('id', '').strip(), row['url'].strip()) for row in csv.DictReader(f) if row.get('url')]
+
+    reducer = TextReducer()
+    texts, seen = [], set()
+    for clinic_id, url in seeds:
+        if url in seen or url not in pages:
+            continue
+        seen.add(url)
+        main_text, links = pages[url]
+        combined = f"\n=== MAIN PAGE ({url}) ===\n{main_text}\n"
+        for target_url in scraper.select_subpage_links(url, links, {url}):
+            if target_url in pages:
+                combined += f"\n=== SUB-PAGE ({target_url}) ===\n{pages[target_url][0]}\n"
+        texts.append((clinic_id or url, reducer.reduce(combined)))
+        if len(texts) >= limit:
+            break
+    return texts
+
+
+async def analyze_single(text):
+    """One clinic on the batch path's model: routing would pick a lighter tier for easy clinics."""
+    try:
+        return await scraper.analyze_with_model(scraper.build_prompt(text), None, scraper.model_router.strongest)
+    except Exception as e:
+        return {"status": "ERROR", "reason": f"Analysis failed: {e}", "languages": ["English"]}
+
+
+async def run_per_clinic(texts, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    tokens = 0
+
+    async def one(text):
+        nonlocal tokens
+        tokens += estimate_tokens(scraper.build_prompt(text))
+        async with semaphore:
+            return await analyze_single(text)
+
+    started = time.monotonic()
+    results = await asyncio.gather(*(one(text) for _, text in texts))
+    return time.monotonic() - started, tokens, results
+
+
+async def run_batched(texts, batch_size):
+    tokens = 0
+
+    async def batch(items):
+        nonlocal tokens
+        tokens += estimate_tokens(scraper.build_batch_prompt(items))
+        return await scraper.analyze_clinic_batch(items)
+
+    async def single(text):
+        nonlocal tokens
+        tokens += estimate_tokens(scraper.build_prompt(text))
+        return await analyze_single(text)
+
+    batcher = BatchAnalyzer(batch, single, max_clinics=batch_size)
+    started = time.monotonic()
+    results = await asyncio.gather(*(batcher.analyze(clinic_id, text) for clinic_id, text in texts))
+    return time.monotonic() - started, tokens, results, batcher
+
+
+def report(label, elapsed, tokens, results, n):
+    errors = sum(1 for r in results if r.get('status') == 'ERROR')
+    print(f"{label:<12} {n / elapsed * 60:8.1f} clinics/min   {tokens / n:8.0f} prompt tokens/clinic (est.)   "
+          f"{elapsed:6.1f}s   {errors} error(s)")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clinics", type=int, default=40)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent requests on the per-clinic path")
+    args = parser.parse_args()
+
+    texts = load_texts(args.clinics)
+    if not texts:
+        print("❌ No cached clinic text found. Run the scraper once to fill the validator cache.")
+        return
+    print(f"📋 Benchmarking {len(texts)} clinics on {scraper.model_router.strongest}\n")
+
+    elapsed, tokens, results = await run_per_clinic(texts, args.concurrency)
+    report("per-clinic", elapsed, tokens, results, len(texts))
+    single_statuses = [r.get('status') for r in results]
+
+    elapsed, tokens, results, batcher = await run_batched(texts, args.batch_size)
+    report(f"batch={args.batch_size}", elapsed, tokens, results, len(texts))
+    batcher.print_stats()
+
+    agreed = sum(a == r.get('status') for a, r in zip(single_statuses, results))
+    print(f"\n🤝 Status agreement between modes: {agreed}/{len(texts)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -30,6 +30,9 @@ echo "$KOFI_TOKEN" > "$TOKEN_FILE"
 
 echo -e "${GREEN}✓${NC} Verification token saved to ${YELLOW}$TOKEN_FILE${NC}"
 
+# The webhook shares the scraper's data-access layer
+cp scraper/datastore.py webhook_service/datastore.py
+
 # Deploy function
 
 gcloud functions deploy "$FUNCTION_NAME" \
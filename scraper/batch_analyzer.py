@@ -0,0 +1,118 @@
+import asyncio
+import os
+import time
+
+from text_reduction import estimate_tokens
+
+VALID_STATUSES = {"OPEN", "CLOSED", "WAITLIST", "UNCERTAIN"}
+
+
+class BatchAnalyzer:
+    """
+    Packs several clinics' reduced texts into one Gemini request.
+
+    Callers await `analyze(clinic_id, text)` as if it were a single analysis.
+    A batch is flushed when it reaches `max_clinics` or `token_budget` estimated
+    tokens, or `flush_seconds` after its first clinic arrived. The response must
+    be an array of verdicts keyed by clinic_id; any clinic missing from a valid
+    response, or every clinic of an invalid one, falls back to a per-clinic call.
+
+    `analyze_batch(items)` sends [(clinic_id, text)] and returns the parsed
+    response; `analyze_single(text)` is the regular per-clinic path.
+    """
+
+    def __init__(self, analyze_batch, analyze_single, max_clinics=8, token_budget=None, flush_seconds=None):
+        self.analyze_batch = analyze_batch
+        self.analyze_single = analyze_single
+        self.max_clinics = max_clinics
+        self.token_budget = token_budget or int(os.environ.get("BATCH_TOKEN_BUDGET", "12000"))
+        self.flush_seconds = flush_seconds or float(os.environ.get("BATCH_FLUSH_SECONDS", "2.0"))
+        self._pending = []  # [(clinic_id, text, future)]
+        self._pending_tokens = 0
+        self._timer = None
+        self._tasks = set()
+        self.batches = 0
+        self.batched_clinics = 0
+        self.fallbacks = 0
+        self.invalid_batches = 0
+        self.batch_seconds = 0.0
+
+    async def analyze(self, clinic_id, text):
+        future = asyncio.get_running_loop().create_future()
+        tokens = estimate_tokens(text)
+        if self._pending and self._pending_tokens + tokens > self.token_budget:
+            self._flush()
+        self._pending.append((clinic_id, text, future))
+        self._pending_tokens += tokens
+        if len(self._pending) >= self.max_clinics:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.flush_seconds, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending, self._pending_tokens = self._pending, [], 0
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        started = time.monotonic()
+        verdicts = {}
+        try:
+            response = await self.analyze_batch([(clinic_id, text) for clinic_id, text, _ in batch])
+            verdicts = self._validate(response, {clinic_id for clinic_id, _, _ in batch})
+        except Exception as e:
+            print(f"  ⚠️ Batch of {len(batch)} failed ({e}), falling back to per-clinic analysis")
+        if not verdicts:
+            self.invalid_batches += 1
+        self.batches += 1
+        self.batch_seconds += time.monotonic() - started
+
+        async def resolve(clinic_id, text, future):
+            if clinic_id in verdicts:
+                self.batched_clinics += 1
+                result = verdicts[clinic_id]
+            else:
+                self.fallbacks += 1
+                result = await self.analyze_single(text)
+            if not future.done():
+                future.set_result(result)
+
+        await asyncio.gather(*(resolve(*item) for item in batch))
+
+    @staticmethod
+    def _validate(response, expected_ids):
+        """Keeps well-formed verdicts for clinics that were actually in the batch."""
+        if isinstance(response, dict):
+            response = response.get("verdicts", response.get("results"))
+        if not isinstance(response, list):
+            return {}
+        verdicts = {}
+        for item in response:
+            if not isinstance(item, dict):
+                continue
+            clinic_id = str(item.get("clinic_id", ""))
+            if clinic_id in expected_ids and item.get("status") in VALID_STATUSES:
+                verdicts[clinic_id] = {k: v for k, v in item.items() if k != "clinic_id"}
+        return verdicts
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "batched_clinics": self.batched_clinics,
+            "fallbacks": self.fallbacks,
+            "invalid_batches": self.invalid_batches,
+            "avg_batch_size": self.batched_clinics / self.batches if self.batches else 0.0,
+            "batch_seconds": round(self.batch_seconds, 2),
+        }
+
+    def print_stats(self):
+        s = self.stats()
+        print(f"📦 Batched analysis: {s['batched_clinics']} clinic(s) in {s['batches']} batch(es) "
+              f"(avg {s['avg_batch_size']:.1f}), {s['fallbacks']} per-clinic fallback(s), "
+              f"{s['invalid_batches']} invalid batch(es)")
@@ -0,0 +1,113 @@
+import hashlib
+import os
+import re
+from collections import defaultdict
+
+from cache_store import connect
+from scheduler import host_key
+from text_reduction import LANGUAGE_PATTERNS, STATUS_PATTERNS, split_pages
+
+_SPACE = re.compile(r'\s+')
+
+# Lines matching a strong status phrase or a language are never treated as boilerplate, even if a
+# chain or directory host repeats them; neither are the lines right next to them, since label/value
+# pairs ("Accepting new patients:" / "No") are often split across lines
+_PROTECTED = [pattern for pattern, weight in STATUS_PATTERNS if weight >= 8] + \
+             [pattern for pattern, _weight in LANGUAGE_PATTERNS]
+
+# Short lines ("No", "Yes", "Full") are too generic for other clinics' pages to prove they're boilerplate
+_MIN_CROSS_CLINIC_CHARS = 20
+
+
+def _protected_lines(lines):
+    """Indexes of lines that may not be dropped on cross-clinic evidence: protected lines and their neighbours."""
+    hits = [i for i, line in enumerate(lines) if any(pattern.search(line) for pattern in _PROTECTED)]
+    return {j for i in hits for j in (i - 1, i, i + 1) if 0 <= j < len(lines)}
+
+
+def _block_hash(line):
+    normalized = _SPACE.sub(' ', line.strip().lower())
+    return hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).hexdigest()
+
+
+class BoilerplateFilter:
+    """
+    Drops repeated header/nav/footer/cookie lines from a clinic's combined crawl text.
+
+    Within one clinic, a line is kept only the first time it appears across its
+    pages. Across clinics on the same host, a line is dropped when the previous
+    runs saw it on at least BOILERPLATE_MIN_CLINICS different clinics of that host,
+    unless it is a status or language line, next to one, or shorter than 20 characters.
+    Cross-clinic counts are loaded at start and saved at close, so a run's output
+    does not depend on the order in which clinics finish.
+    """
+
+    def __init__(self, filename="boilerplate.sqlite3", min_clinics=None):
+        self.min_clinics = min_clinics or int(os.environ.get("BOILERPLATE_MIN_CLINICS", "3"))
+        self.conn = connect(filename)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS domain_blocks (
+                domain TEXT,
+                block TEXT,
+                clinic TEXT,
+                PRIMARY KEY (domain, block, clinic)
+            )
+        """)
+        self.conn.commit()
+        self.known = defaultdict(set)
+        for domain, block in self.conn.execute(
+            "SELECT domain, block FROM domain_blocks GROUP BY domain, block HAVING COUNT(*) >= ?",
+            (self.min_clinics,),
+        ):
+            self.known[domain].add(block)
+        self.pending = []
+        self.lines_in = 0
+        self.lines_dropped = 0
+        self.chars_in = 0
+        self.chars_out = 0
+
+    def strip(self, combined_text, url, clinic_key):
+        domain = host_key(url)
+        domain_blocks = self.known.get(domain, ())
+        seen = set()
+        out = []
+        for header, lines in split_pages(combined_text):
+            if header:
+                out.append(header)
+            protected = _protected_lines(lines)
+            for index, line in enumerate(lines):
+                self.lines_in += 1
+                block = _block_hash(line)
+                self.pending.append((domain, block, clinic_key))
+                cross_clinic = (block in domain_blocks and index not in protected
+                                and len(line.strip()) >= _MIN_CROSS_CLINIC_CHARS)
+                if block in seen or cross_clinic:
+                    self.lines_dropped += 1
+                    continue
+                seen.add(block)
+                out.append(line)
+        stripped = "\n".join(out)
+        self.chars_in += len(combined_text)
+        self.chars_out += len(stripped)
+        return stripped
+
+    def close(self):
+        if self.pending:
+            self.conn.executemany("INSERT OR IGNORE INTO domain_blocks VALUES (?, ?, ?)", self.pending)
+            self.conn.commit()
+            self.pending = []
+        self.conn.close()
+
+    def stats(self):
+        return {
+            "lines_in": self.lines_in,
+            "lines_dropped": self.lines_dropped,
+            "chars_in": self.chars_in,
+            "chars_out": self.chars_out,
+        }
+
+    def print_stats(self):
+        s = self.stats()
+        ratio = s['chars_out'] / s['chars_in'] if s['chars_in'] else 1.0
+        print(f"🧹 Boilerplate: dropped {s['lines_dropped']}/{s['lines_in']} line(s), "
+              f"{s['chars_in'] / 1e3:.0f}k → {s['chars_out'] / 1e3:.0f}k chars ({ratio:.0%})")
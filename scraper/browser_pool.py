@@ -0,0 +1,301 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+
+class _BrowserSlot:
+    """One Chromium instance owned by the pool plus its bookkeeping."""
+
+    def __init__(self, index):
+        self.index = index
+        self.browser = None
+        self.pid = None  # Root Chromium process (child of the Playwright driver)
+        self.active = 0
+        self.pages_served = 0
+        self.draining = False
+        self.crashed = False
+        self.lock = asyncio.Lock()  # Serializes health checks, relaunches and recycles of this browser
+
+
+class BrowserPool:
+    """
+    Run-scoped pool of Chromium instances.
+
+    Browsers are launched once and each clinic gets a fresh BrowserContext, so
+    cookies and storage never leak between clinics. A browser is recycled after
+    `max_pages` pages or when its process tree goes above `memory_limit_mb`
+    (needs psutil), and a crashed browser is relaunched on the next acquire.
+    """
+
+    def __init__(self, size=None, contexts_per_browser=None, max_pages=None,
+                 memory_limit_mb=None, user_agent=DEFAULT_USER_AGENT, blocker=None):
+        self.size = size or int(os.environ.get("BROWSER_POOL_SIZE", "2"))
+        self.contexts_per_browser = contexts_per_browser or int(os.environ.get("BROWSER_CONTEXTS_PER_BROWSER", "4"))
+        self.max_pages = max_pages or int(os.environ.get("BROWSER_MAX_PAGES", "200"))
+        self.memory_limit_mb = memory_limit_mb or int(os.environ.get("BROWSER_MEMORY_LIMIT_MB", "1500"))
+        self.user_agent = user_agent
+        self.blocker = blocker
+
+        self._playwright_cm = None
+        self._playwright = None
+        self._slots = [_BrowserSlot(i) for i in range(self.size)]
+        self._cond = asyncio.Condition()
+        self._launch_lock = asyncio.Lock()
+
+        # Utilization bookkeeping
+        self._started_at = None
+        self._busy_seconds = 0.0
+        self._last_change = None
+        self._in_use = 0
+        self.stats_counters = {
+            "contexts_served": 0,
+            "launches": 0,
+            "recycles_pages": 0,
+            "recycles_memory": 0,
+            "crash_restarts": 0,
+            "peak_in_use": 0,
+            "acquire_wait_seconds": 0.0,
+        }
+
+    @property
+    def capacity(self):
+        return self.size * self.contexts_per_browser
+
+    async def start(self):
+        from playwright.async_api import async_playwright
+
+        self._playwright_cm = async_playwright()
+        self._playwright = await self._playwright_cm.__aenter__()
+        for slot in self._slots:
+            await self._launch(slot)
+        self._started_at = self._last_change = time.monotonic()
+        print(f"🧭 Browser pool started: {self.size} browser(s) × {self.contexts_per_browser} context(s)")
+        return self
+
+    async def close(self):
+        for slot in self._slots:
+            await self._shutdown(slot)
+        if self._playwright_cm:
+            await self._playwright_cm.__aexit__(None, None, None)
+            self._playwright_cm = None
+            self._playwright = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    @asynccontextmanager
+    async def context(self, site_url=None):
+        """
+        Yields a fresh BrowserContext; closes it and releases the slot on exit.
+        The pool's resource blocker is installed unless `site_url`'s host is allowlisted.
+        """
+        slot = await self._acquire()
+        context = None
+        try:
+            browser = slot.browser
+            try:
+                context = await browser.new_context(user_agent=self.user_agent)
+            except Exception:
+                # Browser died between health check and use: relaunch once and retry.
+                # A browser that is still connected is shared with other contexts, so the error is raised.
+                if browser.is_connected():
+                    raise
+                await self._ensure_healthy(slot)
+                context = await slot.browser.new_context(user_agent=self.user_agent)
+
+            def _count_page(_page):
+                slot.pages_served += 1
+
+            context.on("page", _count_page)
+            if self.blocker and self.blocker.applies_to(site_url):
+                await self.blocker.install(context)
+            self.stats_counters["contexts_served"] += 1
+            yield context
+        finally:
+            if context is not None:
+                try:
+                    await context.close()
+                except Exception:
+                    pass
+            await self._release(slot)
+
+    async def _acquire(self):
+        wait_started = time.monotonic()
+        async with self._cond:
+            while True:
+                candidates = [s for s in self._slots
+                              if not s.draining and s.active < self.contexts_per_browser]
+                if candidates:
+                    slot = min(candidates, key=lambda s: s.active)
+                    slot.active += 1
+                    self._mark_in_use(+1)
+                    break
+                await self._cond.wait()
+        self.stats_counters["acquire_wait_seconds"] += time.monotonic() - wait_started
+        try:
+            await self._ensure_healthy(slot)
+        except BaseException:
+            # A failed relaunch must not keep the reservation, or the pool slowly loses capacity
+            async with self._cond:
+                slot.active -= 1
+                self._mark_in_use(-1)
+                self._cond.notify_all()
+            raise
+        return slot
+
+    async def _release(self, slot):
+        async with self._cond:
+            slot.active -= 1
+            self._mark_in_use(-1)
+            if not slot.draining:
+                slot.draining = self._recycle_reason(slot)
+            # Only the last context out of a draining browser relaunches it
+            reason = slot.draining if slot.active == 0 else None
+        try:
+            if reason:
+                self.stats_counters[f"recycles_{reason}"] += 1
+                print(f"  ♻️  Recycling browser #{slot.index} ({reason}, {slot.pages_served} pages)")
+                async with slot.lock:
+                    await self._shutdown(slot)
+                    await self._launch(slot)
+        except Exception as e:
+            # The slot is left without a browser; the next acquire relaunches it
+            print(f"  ❌ Relaunching browser #{slot.index} failed: {e}")
+        finally:
+            if reason:
+                slot.draining = False
+            async with self._cond:
+                self._cond.notify_all()
+
+    def _recycle_reason(self, slot):
+        if slot.pages_served >= self.max_pages:
+            return "pages"
+        if self._memory_mb(slot) > self.memory_limit_mb:
+            return "memory"
+        return None
+
+    def _memory_mb(self, slot):
+        """Resident memory of the browser process tree (each process counted once), or 0 without psutil."""
+        if psutil is None or slot.pid is None:
+            return 0
+        try:
+            root = psutil.Process(slot.pid)
+            procs = {proc.pid: proc for proc in [root, *root.children(recursive=True)]}
+        except psutil.Error:
+            return 0
+        total = 0
+        for proc in procs.values():
+            try:
+                total += proc.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return total / (1024 * 1024)
+
+    @staticmethod
+    def _is_down(slot):
+        return slot.browser is None or slot.crashed or not slot.browser.is_connected()
+
+    async def _ensure_healthy(self, slot):
+        """Relaunches a disconnected browser; concurrent callers on the same slot relaunch it once."""
+        if not self._is_down(slot):
+            return
+        async with slot.lock:
+            if not self._is_down(slot):
+                return  # Another acquirer already relaunched it
+            self.stats_counters["crash_restarts"] += 1
+            print(f"  ⚠️ Browser #{slot.index} crashed, restarting")
+            await self._shutdown(slot)
+            await self._launch(slot)
+
+    async def _launch(self, slot):
+        async with self._launch_lock:
+            before = self._descendant_pids()
+            slot.browser = await self._playwright.chromium.launch(headless=True)
+            slot.pid = self._browser_root(before)
+            slot.pages_served = 0
+            slot.crashed = False
+            slot.draining = False
+            browser = slot.browser
+
+            def _on_disconnected(_browser):
+                # Only the slot's current browser marks it crashed, not one it already replaced
+                if slot.browser is browser:
+                    slot.crashed = True
+
+            browser.on("disconnected", _on_disconnected)
+            self.stats_counters["launches"] += 1
+
+    async def _shutdown(self, slot):
+        browser, slot.browser = slot.browser, None
+        slot.pid = None
+        if browser is not None:
+            try:
+                await browser.close()
+            except Exception:
+                pass
+
+    @staticmethod
+    def _descendant_pids():
+        if psutil is None:
+            return set()
+        try:
+            return {p.pid for p in psutil.Process(os.getpid()).children(recursive=True)}
+        except psutil.Error:
+            return set()
+
+    @staticmethod
+    def _browser_root(before):
+        """
+        Pid of the Chromium just launched: a new process whose parent is the Playwright driver
+        (a direct child of ours). Renderers other browsers spawned meanwhile have a browser parent.
+        """
+        if psutil is None:
+            return None
+        try:
+            me = psutil.Process(os.getpid())
+            drivers = {p.pid for p in me.children()}
+            for proc in me.children(recursive=True):
+                if proc.pid not in before and proc.pid not in drivers and proc.ppid() in drivers:
+                    return proc.pid
+        except psutil.Error:
+            pass
+        return None
+
+    def _mark_in_use(self, delta):
+        now = time.monotonic()
+        if self._last_change is not None:
+            self._busy_seconds += self._in_use * (now - self._last_change)
+        self._last_change = now
+        self._in_use += delta
+        self.stats_counters["peak_in_use"] = max(self.stats_counters["peak_in_use"], self._in_use)
+
+    def stats(self):
+        """Utilization summary: busy context-seconds over available context-seconds."""
+        self._mark_in_use(0)
+        elapsed = (time.monotonic() - self._started_at) if self._started_at else 0.0
+        utilization = self._busy_seconds / (elapsed * self.capacity) if elapsed else 0.0
+        return {
+            "size": self.size,
+            "capacity": self.capacity,
+            "utilization": round(utilization, 3),
+            **{k: round(v, 2) if isinstance(v, float) else v for k, v in self.stats_counters.items()},
+        }
+
+    def print_stats(self):
+        s = self.stats()
+        print(f"🧭 Browser pool: {s['utilization']:.0%} utilized "
+              f"(peak {s['peak_in_use']}/{s['capacity']} contexts, {s['contexts_served']} served)")
+        print(f"   Launches: {s['launches']} | Recycles: {s['recycles_pages']} by pages, "
+              f"{s['recycles_memory']} by memory | Crash restarts: {s['crash_restarts']} | "
+              f"Acquire wait: {s['acquire_wait_seconds']}s")
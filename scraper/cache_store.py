@@ -0,0 +1,18 @@
+import os
+import sqlite3
+
+CACHE_DIR = os.environ.get("SCRAPER_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"))
+
+
+def cache_path(filename):
+    """Path of a file inside the local scraper cache directory (created on demand)."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return os.path.join(CACHE_DIR, filename)
+
+
+def connect(filename):
+    """Opens a sqlite database in the cache directory, in WAL mode so readers never block the writer."""
+    conn = sqlite3.connect(cache_path(filename))
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
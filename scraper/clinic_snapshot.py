@@ -0,0 +1,81 @@
+import time
+
+
+class ClinicSnapshot:
+    """
+    In-memory map of clinic doc id → the verdict fields the scraper writes, plus updatedAt.
+
+    Loaded with one field-masked scan of the `clinics` collection at run start,
+    then kept current as the run writes, so old-status lookups and flip
+    detection don't need a data store read per clinic, and `diff` can tell which
+    fields of a new verdict actually changed.
+    """
+
+    # Fields of a clinic doc written by the scraper; a change to any of them bumps updatedAt
+    CLINIC_FIELDS = ['name', 'address', 'district', 'phone', 'status', 'url', 'vacancy',
+                     'languages', 'evidence', 'reason', 'province']
+    FIELDS = CLINIC_FIELDS + ['updatedAt']
+
+    def __init__(self, store):
+        self.store = store
+        self.docs = {}
+        self.loaded = 0
+        self.load_seconds = 0.0
+        self.lookups = 0
+        self.misses = 0
+        self.docs_written = 0
+        self.docs_skipped = 0
+        self.fields_written = 0
+
+    async def load(self):
+        started = time.monotonic()
+        async for doc_id, data in self.store.clinics.scan(fields=self.FIELDS):
+            self.docs[doc_id] = data
+        self.loaded = len(self.docs)
+        self.load_seconds = time.monotonic() - started
+
+    def get(self, doc_id):
+        """Returns the cached projection of a clinic doc, or None for a clinic not in Firestore yet."""
+        self.lookups += 1
+        doc = self.docs.get(doc_id)
+        if doc is None:
+            self.misses += 1
+        return doc
+
+    def status(self, doc_id):
+        doc = self.get(doc_id)
+        return doc.get('status') if doc else None
+
+    def diff(self, doc_id, fields):
+        """Returns the subset of `fields` that differs from the cached doc (all of them for a new clinic)."""
+        cached = self.docs.get(doc_id)
+        changes = {k: v for k, v in fields.items() if cached is None or cached.get(k) != v}
+        if changes:
+            self.docs_written += 1
+            self.fields_written += len(changes)
+        else:
+            self.docs_skipped += 1
+        return changes
+
+    def update(self, doc_id, fields):
+        """Applies the projected fields of a write that was just sent."""
+        doc = self.docs.setdefault(doc_id, {})
+        doc.update({k: v for k, v in fields.items() if k in self.FIELDS})
+
+    def stats(self):
+        return {
+            "loaded": self.loaded,
+            "load_seconds": round(self.load_seconds, 2),
+            "lookups": self.lookups,
+            "misses": self.misses,
+            "docs_written": self.docs_written,
+            "docs_skipped": self.docs_skipped,
+            "fields_written": self.fields_written,
+        }
+
+    def print_stats(self):
+        s = self.stats()
+        print(f"🗂️  Clinic snapshot: {s['loaded']} doc(s) loaded in {s['load_seconds']}s, "
+              f"{s['lookups']} status lookup(s) served from memory ({s['misses']} new clinic(s))")
+        print(f"   Clinic docs: {s['docs_written']} changed ({s['fields_written']} field(s) written), "
+              f"{s['docs_skipped']} unchanged and left alone")
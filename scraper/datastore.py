@@ -0,0 +1,368 @@
+"""
+Async data access for Clinic Scout: clinics, users, notifications and transactions.
+
+Backends (DATASTORE_BACKEND):
+  "firestore" – Cloud Firestore via firebase-admin (default)
+  "emulator"  – the local Firestore emulator at FIRESTORE_EMULATOR_HOST (default localhost:8080)
+  "sqlite"    – a local sqlite file at DATASTORE_SQLITE_PATH (default clinic_scout.sqlite3)
+  "memory"    – in-process dicts, for tests and offline benchmarks
+
+This module only depends on the standard library (plus the Firestore client for
+the Firestore backends), because deploy_webhook.sh copies it into webhook_service/.
+"""
+
+import asyncio
+import copy
+import json
+import os
+import sqlite3
+import uuid
+from datetime import datetime, timezone
+
+_OPS = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a is not None and a < b,
+    "<=": lambda a, b: a is not None and a <= b,
+    ">": lambda a, b: a is not None and a > b,
+    ">=": lambda a, b: a is not None and a >= b,
+    "in": lambda a, b: a in b,
+    "array_contains": lambda a, b: isinstance(a, list) and b in a,
+}
+
+
+def merge_fields(target, fields):
+    """Firestore merge semantics: nested maps are merged, everything else is replaced."""
+    for key, value in fields.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            merge_fields(target[key], value)
+        else:
+            target[key] = copy.deepcopy(value)
+
+
+def _matches(data, where):
+    return all(_OPS[op](data.get(field), value) for field, op, value in where)
+
+
+def _project(data, fields):
+    return {k: v for k, v in data.items() if k in fields} if fields else data
+
+
+class Clinics:
+    def __init__(self, store):
+        self.store = store
+
+    async def get(self, clinic_id):
+        return await self.store.get('clinics', clinic_id)
+
+    def scan(self, fields=None):
+        """Async iterator of (clinic_id, data), projected to `fields` when given."""
+        return self.store.query('clinics', fields=fields)
+
+    async def set(self, clinic_id, fields, merge=True):
+        await self.store.set('clinics', clinic_id, fields, merge=merge)
+
+
+class Users:
+    def __init__(self, store):
+        self.store = store
+
+    async def get(self, user_id):
+        return await self.store.get('users', user_id)
+
+    async def find_by_email(self, email):
+        """Returns (user_id, data) of the first user with this email, or None."""
+        async for user_id, data in self.store.query('users', where=[('email', '==', email)], limit=1):
+            return user_id, data
+        return None
+
+    def premium(self):
+        """Async iterator of (user_id, data) for every premium user."""
+        return self.store.query('users', where=[('isPremium', '==', True)])
+
+    async def update(self, user_id, fields):
+        await self.store.update('users', user_id, fields)
+
+
+class Notifications:
+    def __init__(self, store):
+        self.store = store
+
+    async def add(self, record):
+        return await self.store.add('notifications', record)
+
+
+class Transactions:
+    def __init__(self, store):
+        self.store = store
+
+    async def add(self, record):
+        return await self.store.add('transactions', record)
+
+
+class DataStore:
+    """
+    Backend-independent collection primitives plus the typed repositories
+    (`clinics`, `users`, `notifications`, `transactions`) built on them.
+    """
+
+    backend = None
+
+    def __init__(self):
+        self.clinics = Clinics(self)
+        self.users = Users(self)
+        self.notifications = Notifications(self)
+        self.transactions = Transactions(self)
+
+    def server_timestamp(self):
+        return datetime.now(timezone.utc)
+
+    async def get(self, collection, doc_id):
+        """Returns the document's data, or None if it doesn't exist."""
+        raise NotImplementedError
+
+    def query(self, collection, where=(), fields=None, limit=None):
+        """Async iterator of (doc_id, data) matching every (field, op, value) in `where`."""
+        raise NotImplementedError
+
+    async def set(self, collection, doc_id, fields, merge=True):
+        raise NotImplementedError
+
+    async def update(self, collection, doc_id, fields):
+        """Like set with merge, but raises KeyError when the document doesn't exist."""
+        raise NotImplementedError
+
+    async def add(self, collection, fields):
+        """Creates a document with a generated id and returns the id."""
+        raise NotImplementedError
+
+    async def batch_set(self, writes):
+        """Merge-sets [(collection, doc_id, fields)] together."""
+        for collection, doc_id, fields in writes:
+            await self.set(collection, doc_id, fields, merge=True)
+
+    async def close(self):
+        pass
+
+
+class FirestoreStore(DataStore):
+    """Cloud Firestore (or the emulator) through the async client."""
+
+    backend = "firestore"
+
+    def __init__(self, client, backend="firestore"):
+        super().__init__()
+        from google.cloud import firestore as gcf
+        self._server_timestamp = gcf.SERVER_TIMESTAMP
+        self.client = client
+        self.backend = backend
+
+    def server_timestamp(self):
+        return self._server_timestamp
+
+    async def get(self, collection, doc_id):
+        snapshot = await self.client.collection(collection).document(doc_id).get()
+        return snapshot.to_dict() if snapshot.exists else None
+
+    async def query(self, collection, where=(), fields=None, limit=None):
+        query = self.client.collection(collection)
+        for field, op, value in where:
+            query = query.where(field, op, value)
+        if fields:
+            query = query.select(list(fields))
+        if limit:
+            query = query.limit(limit)
+        async for doc in query.stream():
+            yield doc.id, doc.to_dict() or {}
+
+    async def set(self, collection, doc_id, fields, merge=True):
+        await self.client.collection(collection).document(doc_id).set(fields, merge=merge)
+
+    async def update(self, collection, doc_id, fields):
+        try:
+            await self.client.collection(collection).document(doc_id).update(fields)
+        except Exception as e:
+            if e.__class__.__name__ == "NotFound":
+                raise KeyError(f"{collection}/{doc_id}") from e
+            raise
+
+    async def add(self, collection, fields):
+        _, doc_ref = await self.client.collection(collection).add(fields)
+        return doc_ref.id
+
+    async def batch_set(self, writes):
+        batch = self.client.batch()
+        for collection, doc_id, fields in writes:
+            batch.set(self.client.collection(collection).document(doc_id), fields, merge=True)
+        await batch.commit()
+
+    async def close(self):
+        result = self.client.close()
+        if asyncio.iscoroutine(result):
+            await result
+
+
+class MemoryStore(DataStore):
+    """Everything in process memory; starts empty unless `data` ({collection: {id: doc}}) is given."""
+
+    backend = "memory"
+
+    def __init__(self, data=None):
+        super().__init__()
+        self.data = copy.deepcopy(data) if data else {}
+
+    async def get(self, collection, doc_id):
+        doc = self.data.get(collection, {}).get(doc_id)
+        return copy.deepcopy(doc) if doc is not None else None
+
+    async def query(self, collection, where=(), fields=None, limit=None):
+        found = 0
+        for doc_id, data in list(self.data.get(collection, {}).items()):
+            if _matches(data, where):
+                yield doc_id, copy.deepcopy(_project(data, fields))
+                found += 1
+                if limit and found >= limit:
+                    return
+
+    async def set(self, collection, doc_id, fields, merge=True):
+        docs = self.data.setdefault(collection, {})
+        if merge and doc_id in docs:
+            merge_fields(docs[doc_id], fields)
+        else:
+            docs[doc_id] = copy.deepcopy(fields)
+
+    async def update(self, collection, doc_id, fields):
+        if doc_id not in self.data.get(collection, {}):
+            raise KeyError(f"{collection}/{doc_id}")
+        merge_fields(self.data[collection][doc_id], fields)
+
+    async def add(self, collection, fields):
+        doc_id = uuid.uuid4().hex[:20]
+        self.data.setdefault(collection, {})[doc_id] = copy.deepcopy(fields)
+        return doc_id
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    raise TypeError(f"Can't store {type(value).__name__}")
+
+
+def _decode(obj):
+    if "__datetime__" in obj and len(obj) == 1:
+        return datetime.fromisoformat(obj["__datetime__"])
+    return obj
+
+
+class SqliteStore(DataStore):
+    """One sqlite table of JSON documents; queries are filtered in Python."""
+
+    backend = "sqlite"
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS documents (
+                collection TEXT,
+                doc_id TEXT,
+                data TEXT,
+                PRIMARY KEY (collection, doc_id)
+            )
+        """)
+        self.conn.commit()
+
+    def _load(self, collection, doc_id):
+        row = self.conn.execute(
+            "SELECT data FROM documents WHERE collection = ? AND doc_id = ?", (collection, doc_id)
+        ).fetchone()
+        return json.loads(row[0], object_hook=_decode) if row else None
+
+    def _store(self, collection, doc_id, data):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO documents VALUES (?, ?, ?)",
+            (collection, doc_id, json.dumps(data, default=_encode)),
+        )
+
+    async def get(self, collection, doc_id):
+        return self._load(collection, doc_id)
+
+    async def query(self, collection, where=(), fields=None, limit=None):
+        rows = self.conn.execute("SELECT doc_id, data FROM documents WHERE collection = ?", (collection,)).fetchall()
+        found = 0
+        for doc_id, raw in rows:
+            data = json.loads(raw, object_hook=_decode)
+            if _matches(data, where):
+                yield doc_id, _project(data, fields)
+                found += 1
+                if limit and found >= limit:
+                    return
+
+    async def set(self, collection, doc_id, fields, merge=True):
+        data = self._load(collection, doc_id) if merge else None
+        if data is None:
+            data = {}
+        merge_fields(data, fields)
+        self._store(collection, doc_id, data)
+        self.conn.commit()
+
+    async def update(self, collection, doc_id, fields):
+        data = self._load(collection, doc_id)
+        if data is None:
+            raise KeyError(f"{collection}/{doc_id}")
+        merge_fields(data, fields)
+        self._store(collection, doc_id, data)
+        self.conn.commit()
+
+    async def add(self, collection, fields):
+        doc_id = uuid.uuid4().hex[:20]
+        self._store(collection, doc_id, fields)
+        self.conn.commit()
+        return doc_id
+
+    async def batch_set(self, writes):
+        for collection, doc_id, fields in writes:
+            data = self._load(collection, doc_id) or {}
+            merge_fields(data, fields)
+            self._store(collection, doc_id, data)
+        self.conn.commit()
+
+    async def close(self):
+        self.conn.close()
+
+
+def _firestore_client(key_paths):
+    """A new async client per call, since an async client is bound to the event loop it first runs on."""
+    import firebase_admin
+    from firebase_admin import credentials
+    from google.cloud import firestore as gcf
+
+    if not firebase_admin._apps:
+        key_path = next((p for p in key_paths if os.path.exists(p)), None)
+        if key_path:
+            firebase_admin.initialize_app(credentials.Certificate(key_path))
+        else:
+            # Application Default Credentials (Cloud Functions, gcloud auth)
+            firebase_admin.initialize_app()
+    app = firebase_admin.get_app()
+    return gcf.AsyncClient(project=app.project_id, credentials=app.credential.get_credential())
+
+
+def open_datastore(backend=None, key_paths=("serviceAccountKey.json", "../serviceAccountKey.json")):
+    """Opens the configured backend. Raises on missing dependencies or credentials."""
+    backend = (backend or os.environ.get("DATASTORE_BACKEND", "firestore")).lower()
+    if backend == "memory":
+        return MemoryStore()
+    if backend == "sqlite":
+        return SqliteStore(os.environ.get("DATASTORE_SQLITE_PATH", "clinic_scout.sqlite3"))
+    if backend == "emulator":
+        from google.cloud import firestore as gcf
+        os.environ.setdefault("FIRESTORE_EMULATOR_HOST", "localhost:8080")
+        project = os.environ.get("FIRESTORE_PROJECT", "clinic-scout-local")
+        return FirestoreStore(gcf.AsyncClient(project=project), backend="emulator")
+    if backend == "firestore":
+        return FirestoreStore(_firestore_client(key_paths))
+    raise ValueError(f"Unknown DATASTORE_BACKEND '{backend}'")
+
@@ -0,0 +1,118 @@
+import difflib
+import json
+import os
+import time
+
+from cache_store import connect
+
+
+def diff_blocks(old_text, new_text):
+    """Line-level diff of two reduced texts; returns (removed_blocks, added_blocks) as lists of strings."""
+    old_lines = [line for line in old_text.splitlines() if line.strip()]
+    new_lines = [line for line in new_text.splitlines() if line.strip()]
+    removed, added = [], []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for op, i1, i2, j1, j2 in matcher.get_opcodes():
+        if op in ("replace", "delete"):
+            removed.append("\n".join(old_lines[i1:i2]))
+        if op in ("replace", "insert"):
+            added.append("\n".join(new_lines[j1:j2]))
+    return removed, added
+
+
+class DeltaAnalyzer:
+    """
+    Sends Gemini only what changed when a clinic's page was edited slightly.
+
+    The reduced text and verdict of each clinic's last Gemini analysis are kept
+    on disk. When the new reduced text differs from it by at most DELTA_MAX_CHANGE
+    (share of the new text's characters), `analyze_delta(previous_verdict, removed,
+    added)` is called with just the changed blocks; otherwise, and for clinics
+    seen for the first time, `analyze_full(clinic_id, text)` runs as before.
+    Enabled with DELTA_ANALYSIS=true.
+    """
+
+    def __init__(self, analyze_full, analyze_delta, filename="delta_texts.sqlite3", max_change=None, enabled=None):
+        self.analyze_full = analyze_full
+        self.analyze_delta = analyze_delta
+        self.max_change = max_change or float(os.environ.get("DELTA_MAX_CHANGE", "0.25"))
+        if enabled is None:
+            enabled = os.environ.get("DELTA_ANALYSIS", "false").lower() == "true"
+        self.enabled = enabled
+        self.full = 0
+        self.delta = 0
+        self.identical = 0
+        self.tokens_saved = 0
+        self.conn = None
+        if not self.enabled:
+            return
+
+        self.conn = connect(filename)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS analyzed_texts (
+                clinic_id TEXT PRIMARY KEY,
+                text TEXT,
+                verdict TEXT,
+                analyzed_at REAL
+            )
+        """)
+        self.conn.commit()
+
+    async def analyze(self, clinic_id, text):
+        if self.conn is None:
+            self.full += 1
+            return await self.analyze_full(clinic_id, text)
+
+        row = self.conn.execute(
+            "SELECT text, verdict FROM analyzed_texts WHERE clinic_id = ?", (clinic_id,)
+        ).fetchone()
+        if row:
+            removed, added = diff_blocks(row[0], text)
+            changed = sum(len(block) for block in removed + added)
+            if not changed:
+                # Only text outside the reduced windows moved
+                self.identical += 1
+                return json.loads(row[1])
+            if changed <= self.max_change * len(text):
+                self.delta += 1
+                self.tokens_saved += (len(text) - changed) // 4
+                result = await self.analyze_delta(json.loads(row[1]), removed, added)
+                self._remember(clinic_id, text, result)
+                return result
+
+        self.full += 1
+        result = await self.analyze_full(clinic_id, text)
+        self._remember(clinic_id, text, result)
+        return result
+
+    def _remember(self, clinic_id, text, verdict):
+        if verdict.get('status') == 'ERROR':
+            return  # Keep the last good baseline
+        self.conn.execute(
+            "INSERT OR REPLACE INTO analyzed_texts VALUES (?, ?, ?, ?)",
+            (clinic_id, text, json.dumps(verdict), time.time()),
+        )
+        self.conn.commit()
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def stats(self):
+        total = self.full + self.delta + self.identical
+        return {
+            "enabled": self.enabled,
+            "full": self.full,
+            "delta": self.delta,
+            "identical": self.identical,
+            "delta_rate": (self.delta + self.identical) / total if total else 0.0,
+            "tokens_saved": self.tokens_saved,
+        }
+
+    def print_stats(self):
+        s = self.stats()
+        if not s['enabled']:
+            return
+        print(f"🔀 Delta analysis: {s['full']} full, {s['delta']} delta, {s['identical']} unchanged after reduction "
+              f"({s['delta_rate']:.0%} avoided a full analysis, ~{s['tokens_saved']} prompt tokens saved)")
@@ -0,0 +1,219 @@
+import json
+import os
+import re
+import time
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+from browser_pool import DEFAULT_USER_AGENT
+from cache_store import cache_path
+from http_cache import ValidatorCache
+from scheduler import host_key
+
+# Below this many characters of visible text a static page is treated as JS-rendered
+STATIC_MIN_CHARS = int(os.environ.get("STATIC_MIN_CHARS", "400"))
+
+# Markers of client-side rendered shells (React/Next/Vue/Wix/Squarespace loaders, noscript warnings)
+JS_SHELL_PATTERNS = re.compile(
+    r'<div id="(?:root|app|__next|__nuxt)"[^>]*>\s*</div>'
+    r'|enable javascript|javascript is (?:disabled|required)|please turn on javascript',
+    re.IGNORECASE,
+)
+
+_SKIP_TAGS = {'script', 'style', 'noscript', 'template', 'svg', 'head', 'iframe'}
+_BLOCK_TAGS = {'p', 'div', 'section', 'article', 'header', 'footer', 'nav', 'li', 'ul', 'ol', 'tr',
+               'table', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'br', 'main', 'aside', 'form', 'blockquote'}
+
+
+class _TextExtractor(HTMLParser):
+    """Single-pass HTML → visible text + anchor list, roughly matching document.body.innerText."""
+
+    def __init__(self, base_url):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.parts = []
+        self.links = []
+        self._skip_depth = 0
+        self._anchor = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+        if tag == 'a':
+            href = dict(attrs).get('href')
+            self._anchor = {'href': urljoin(self.base_url, href) if href else '', 'text': []}
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+        if tag == 'a' and self._anchor is not None:
+            self.links.append({'href': self._anchor['href'], 'text': " ".join(self._anchor['text']).lower()})
+            self._anchor = None
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        data = data.strip()
+        if data:
+            self.parts.append(data + " ")
+            if self._anchor is not None:
+                self._anchor['text'].append(data)
+
+    def text(self):
+        lines = (line.strip() for line in "".join(self.parts).splitlines())
+        return "\n".join(line for line in lines if line)
+
+
+def html_to_text(html, base_url):
+    """Returns (visible_text, links) for an HTML document."""
+    parser = _TextExtractor(base_url)
+    parser.feed(html)
+    parser.close()
+    return parser.text(), parser.links
+
+
+def looks_js_rendered(html, text):
+    """Empty-ish text, or a known JS shell whose static text is still thin."""
+    if len(text) < STATIC_MIN_CHARS:
+        return True
+    return len(text) < STATIC_MIN_CHARS * 5 and bool(JS_SHELL_PATTERNS.search(html[:200000]))
+
+
+class StaticFetcher:
+    """
+    Pooled async HTTP client used before Playwright.
+
+    Remembers per domain whether the static path worked ("static") or had to
+    escalate to a browser ("browser"), so later runs go straight to the right
+    path. Decisions expire after FETCH_MODE_TTL_DAYS so sites get re-probed.
+    """
+
+    def __init__(self, path=None, ttl_days=None):
+        self.path = path or cache_path("fetch_modes.json")
+        self.ttl = (ttl_days or float(os.environ.get("FETCH_MODE_TTL_DAYS", "14"))) * 86400
+        self.enabled = httpx is not None and os.environ.get("STATIC_FETCH", "true").lower() == "true"
+        self.client = None
+        self.modes = {}
+        self.validators = ValidatorCache() if self.enabled else None
+        self.stats_counters = {"static_ok": 0, "escalated": 0, "escalated_transient": 0,
+                               "browser_direct": 0, "static_bytes": 0}
+        self._js_rendered = set()  # URLs whose last fetch looked JS-rendered
+
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.modes = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Could not read {self.path}: {e}")
+
+    async def start(self):
+        if self.enabled:
+            self.client = httpx.AsyncClient(
+                headers={"User-Agent": DEFAULT_USER_AGENT},
+                follow_redirects=True,
+                timeout=httpx.Timeout(15.0, connect=10.0),
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+            )
+        elif httpx is None:
+            print("⚠️ httpx not installed. Static fetch disabled, using Playwright only.")
+        return self
+
+    async def close(self):
+        if self.client:
+            await self.client.aclose()
+            self.client = None
+        if self.validators:
+            self.validators.close()
+        self.save()
+
+    def save(self):
+        try:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.modes, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"⚠️ Could not save {self.path}: {e}")
+
+    def should_try_static(self, url):
+        if not self.client:
+            return False
+        entry = self.modes.get(host_key(url))
+        if entry and entry['mode'] == 'browser' and time.time() - entry['updated'] < self.ttl:
+            self.stats_counters["browser_direct"] += 1
+            return False
+        return True
+
+    def record(self, url, mode):
+        self.modes[host_key(url)] = {"mode": mode, "updated": time.time()}
+        self.stats_counters["static_ok" if mode == "static" else "escalated"] += 1
+
+    def escalate(self, url, sub_pages=()):
+        """
+        Records a crawl that failed statically on its main page or one of its `sub_pages`. Only a
+        JS-rendered page sends the domain to the browser for FETCH_MODE_TTL_DAYS; a timeout or
+        error status just escalates this once.
+        """
+        pages = [url, *sub_pages]
+        js_rendered = any(page in self._js_rendered for page in pages)
+        self._js_rendered.difference_update(pages)
+        if js_rendered:
+            self.record(url, "browser")
+        else:
+            self.stats_counters["escalated_transient"] += 1
+
+    async def fetch(self, url):
+        """
+        Returns (text, links) or None when the page is unreachable, not HTML, or JS-rendered.
+        Sends conditional headers from the validator cache; a 304 (or an identical body)
+        reuses the previously extracted text without re-parsing.
+        """
+        self._js_rendered.discard(url)
+        cached = self.validators.get(url)
+        try:
+            response = await self.client.get(url, headers=ValidatorCache.conditional_headers(cached))
+        except httpx.HTTPError:
+            return None
+        if response.status_code == 304 and cached:
+            self.validators.record_hit(url)
+            return cached['text'], cached['links']
+        if response.status_code >= 400 or 'html' not in response.headers.get('content-type', 'text/html'):
+            return None
+
+        self.stats_counters["static_bytes"] += len(response.content)
+        content_hash = ValidatorCache.hash_body(response.content)
+        if cached and cached['content_hash'] == content_hash:
+            # Server ignored our validators but the body is byte-identical
+            self.validators.record_hit(url, response.headers)
+            return cached['text'], cached['links']
+
+        html = response.text
+        text, links = html_to_text(html, str(response.url))
+        if looks_js_rendered(html, text):
+            self._js_rendered.add(url)
+            return None
+        self.validators.store(url, response.headers, content_hash, text, links)
+        return text, links
+
+    def stats(self):
+        stats = dict(self.stats_counters)
+        if self.validators:
+            stats.update(self.validators.stats())
+        return stats
+
+    def print_stats(self):
+        s = self.stats()
+        print(f"⚡ Static fetch: {s['static_ok']} static, {s['escalated']} escalated "
+              f"(+{s['escalated_transient']} once, after an HTTP error), {s['browser_direct']} straight to browser | {s['static_bytes'] / 1e6:.1f} MB downloaded")
+        if self.validators:
+            print(f"   Validator cache: {s['validator_hits']}/{s['validator_lookups']} unchanged "
+                  f"({s['validator_hit_ratio']:.0%} hit ratio, {s['validator_304s']} via 304)")
@@ -0,0 +1,117 @@
+import hashlib
+import json
+import re
+import time
+
+from cache_store import connect
+
+# Banner/footer phrases that change between visits without saying anything about intake status
+_NOISE_LINE = re.compile(
+    r'cookie|privacy policy|accept all|we use cookies|all rights reserved|©|copyright'
+    r'|last updated|skip to (?:main )?content',
+    re.IGNORECASE,
+)
+# Full and abbreviated month names only: a bare prefix would turn "Market 12" or "Decision 5" into a date
+_MONTHS = (r'(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?'
+           r'|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\b\.?')
+_DATE = re.compile(
+    r'\b\d{4}-\d{2}-\d{2}\b'
+    r'|\b\d{1,2}/\d{1,2}/\d{2,4}\b'
+    rf'|\b{_MONTHS}\s+\d{{4}}\b'  # "May 2025" before "May 20" takes its first two digits
+    rf'|\b{_MONTHS}\s+\d{{1,2}}(?:st|nd|rd|th)?\b(?:,?\s*\d{{4}}\b)?'
+    rf'|\b\d{{1,2}}\s+{_MONTHS}(?:\s*\d{{4}}\b)?',
+    re.IGNORECASE,
+)
+_TIME = re.compile(r'\b\d{1,2}:\d{2}(?::\d{2})?\s*(?:am|pm)?\b', re.IGNORECASE)
+_YEAR = re.compile(r'\b(?:19|20)\d{2}\b')
+_SPACE = re.compile(r'\s+')
+# innerText can put a whole paragraph on one line: longer lines only lose their noisy sentences
+_NOISE_MAX_LINE = 120
+_SENTENCE = re.compile(r'(?<=[.!?|])\s+')
+
+
+def normalize_text(text):
+    """Lowercases, drops cookie/footer fragments, masks dates and times, and collapses whitespace."""
+    lines = []
+    for line in text.lower().splitlines():
+        if _NOISE_LINE.search(line):
+            if len(line.strip()) <= _NOISE_MAX_LINE:
+                continue
+            line = " ".join(s for s in _SENTENCE.split(line) if not _NOISE_LINE.search(s))
+        if not line.strip():
+            continue
+        line = _DATE.sub('<date>', line)
+        line = _TIME.sub('<time>', line)
+        line = _YEAR.sub('<year>', line)
+        lines.append(_SPACE.sub(' ', line).strip())
+    return "\n".join(lines)
+
+
+def fingerprint(text):
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+class FingerprintGate:
+    """
+    Remembers the normalized-text fingerprint and verdict of each clinic's last
+    analysis so an unchanged clinic can reuse its verdict without an LLM call.
+    """
+
+    def __init__(self, filename="verdicts.sqlite3"):
+        self.conn = connect(filename)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS verdicts (
+                clinic_id TEXT PRIMARY KEY,
+                fingerprint TEXT,
+                verdict TEXT,
+                analyzed_at REAL
+            )
+        """)
+        self.conn.commit()
+        self.checked = 0
+        self.reused = 0
+
+    def lookup(self, clinic_id, fp):
+        """Returns a copy of the previous verdict if the fingerprint matches, else None."""
+        self.checked += 1
+        row = self.conn.execute(
+            "SELECT fingerprint, verdict FROM verdicts WHERE clinic_id = ?", (clinic_id,)
+        ).fetchone()
+        if not row or row[0] != fp:
+            return None
+        self.reused += 1
+        return json.loads(row[1])
+
+    def previous(self, clinic_id):
+        """Returns the last stored verdict for a clinic regardless of fingerprint, or None."""
+        row = self.conn.execute("SELECT verdict FROM verdicts WHERE clinic_id = ?", (clinic_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def remember(self, clinic_id, fp, verdict):
+        if verdict.get('status') == 'ERROR':
+            return  # Never pin a failed analysis
+        self.conn.execute(
+            "INSERT OR REPLACE INTO verdicts VALUES (?, ?, ?, ?)",
+            (clinic_id, fp, json.dumps(verdict), time.time()),
+        )
+        self.conn.commit()
+
+    def invalidate(self, clinic_id):
+        """Forgets the fingerprint (keeping the verdict for `previous`), so the next run re-analyzes the clinic."""
+        self.conn.execute("UPDATE verdicts SET fingerprint = NULL WHERE clinic_id = ?", (clinic_id,))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def stats(self):
+        return {
+            "checked": self.checked,
+            "reused": self.reused,
+            "reuse_rate": self.reused / self.checked if self.checked else 0.0,
+        }
+
+    def print_stats(self):
+        s = self.stats()
+        print(f"🧬 Fingerprint gate: reused {s['reused']}/{s['checked']} verdicts "
+              f"({s['reuse_rate']:.0%}) without calling Gemini")
@@ -0,0 +1,120 @@
+import asyncio
+import os
+import random
+import time
+
+from datastore import merge_fields
+
+
+class FirestoreWriter:
+    """
+    Background writer for merge-sets, so the pipeline never waits on the data store.
+
+    `set(collection, doc_id, fields)` only records the update; updates to the
+    same document are coalesced with the same merge semantics as the store
+    (nested maps merge, later values win). A background task commits
+    pending documents with `store.batch_set` in batches of up to
+    FIRESTORE_BATCH_SIZE (Firestore caps a batch at 500 writes) once a batch is
+    full or FIRESTORE_FLUSH_SECONDS after the first pending update. Failed batches are retried up to
+    FIRESTORE_MAX_RETRIES times with jittered backoff, then dropped; the dropped
+    (collection, doc_id) keys are listed in `failed_docs` for the caller.
+    `close()` flushes everything still pending.
+    """
+
+    def __init__(self, store, batch_size=None, flush_seconds=None, max_retries=None):
+        self.store = store
+        self.batch_size = min(500, batch_size or int(os.environ.get("FIRESTORE_BATCH_SIZE", "200")))
+        self.flush_seconds = flush_seconds or float(os.environ.get("FIRESTORE_FLUSH_SECONDS", "1.0"))
+        self.max_retries = max_retries if max_retries is not None else int(os.environ.get("FIRESTORE_MAX_RETRIES", "3"))
+        self._pending = {}  # (collection, doc_id) -> fields
+        self._wakeup = asyncio.Event()
+        self._closing = False
+        self._task = None
+
+        self.requested = 0
+        self.coalesced = 0
+        self.committed = 0
+        self.batches = 0
+        self.retries = 0
+        self.failed = 0
+        self.failed_docs = []
+        self.commit_seconds = 0.0
+        self.max_batch = 0
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    def set(self, collection, doc_id, fields):
+        """Queues a merge-set of `fields` on collection/doc_id; returns immediately."""
+        self.requested += 1
+        key = (collection, doc_id)
+        if key in self._pending:
+            self.coalesced += 1
+        merge_fields(self._pending.setdefault(key, {}), fields)
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            if not self._pending and self._closing:
+                return
+            if len(self._pending) < self.batch_size and not self._closing:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_seconds)
+                except asyncio.TimeoutError:
+                    pass
+            self._wakeup.clear()
+            if self._pending:
+                await self._flush_batch()
+
+    async def _flush_batch(self):
+        keys = list(self._pending)[:self.batch_size]
+        writes = {key: self._pending.pop(key) for key in keys}
+        attempt = 0
+        while True:
+            started = time.monotonic()
+            try:
+                await self.store.batch_set([(c, d, f) for (c, d), f in writes.items()])
+            except Exception as e:
+                if attempt >= self.max_retries:
+                    self.failed += len(writes)
+                    self.failed_docs.extend(writes)
+                    print(f"  ❌ Firestore batch of {len(writes)} failed after {attempt} retries: {e}")
+                    return
+                attempt += 1
+                self.retries += 1
+                await asyncio.sleep(random.uniform(0, min(10.0, 0.5 * 2 ** attempt)))
+                continue
+            self.commit_seconds += time.monotonic() - started
+            self.committed += len(writes)
+            self.batches += 1
+            self.max_batch = max(self.max_batch, len(writes))
+            return
+
+    async def close(self):
+        """Flushes every pending update, then stops the background task."""
+        self._closing = True
+        self._wakeup.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+    def stats(self):
+        return {
+            "requested": self.requested,
+            "coalesced": self.coalesced,
+            "committed": self.committed,
+            "batches": self.batches,
+            "avg_batch": self.committed / self.batches if self.batches else 0.0,
+            "max_batch": self.max_batch,
+            "retries": self.retries,
+            "failed": self.failed,
+            "docs_per_second": self.committed / self.commit_seconds if self.commit_seconds else 0.0,
+        }
+
+    def print_stats(self):
+        s = self.stats()
+        print(f"✍️  Firestore writer: {s['committed']} doc write(s) in {s['batches']} batch(es) "
+              f"(avg {s['avg_batch']:.1f}, max {s['max_batch']}), {s['coalesced']} coalesced, "
+              f"{s['retries']} retried, {s['failed']} failed | {s['docs_per_second']:.0f} docs/s while committing")
@@ -0,0 +1,96 @@
+import hashlib
+import json
+import os
+import time
+
+from cache_store import connect
+
+
+class ValidatorCache:
+    """
+    Persistent per-URL HTTP validators (ETag, Last-Modified, body hash) plus the
+    text extracted from that body, so unchanged pages skip download and parsing.
+    Entries older than VALIDATOR_TTL_DAYS are purged when the cache opens.
+    """
+
+    def __init__(self, filename="http_validators.sqlite3", ttl_days=None):
+        self.ttl = (ttl_days or float(os.environ.get("VALIDATOR_TTL_DAYS", "30"))) * 86400
+        self.conn = connect(filename)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS validators (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT,
+                text TEXT,
+                links TEXT,
+                fetched_at REAL
+            )
+        """)
+        expired = self.conn.execute("DELETE FROM validators WHERE fetched_at < ?", (time.time() - self.ttl,)).rowcount
+        self.conn.commit()
+        self.lookups = 0
+        self.hits = 0
+        self.not_modified = 0
+        self.expired = expired
+
+    @staticmethod
+    def hash_body(body):
+        return hashlib.sha256(body).hexdigest()
+
+    @staticmethod
+    def conditional_headers(entry):
+        headers = {}
+        if entry:
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def get(self, url):
+        self.lookups += 1
+        row = self.conn.execute(
+            "SELECT etag, last_modified, content_hash, text, links FROM validators WHERE url = ?", (url,)
+        ).fetchone()
+        if not row:
+            return None
+        return {
+            'etag': row[0],
+            'last_modified': row[1],
+            'content_hash': row[2],
+            'text': row[3],
+            'links': json.loads(row[4]),
+        }
+
+    def store(self, url, headers, content_hash, text, links):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO validators VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (url, headers.get('etag'), headers.get('last-modified'), content_hash, text, json.dumps(links), time.time()),
+        )
+        self.conn.commit()
+
+    def record_hit(self, url, headers=None):
+        """Counts an unchanged page; a 304 has no new headers, a 200 with the same body may refresh them."""
+        self.hits += 1
+        if headers is None:
+            self.not_modified += 1
+            self.conn.execute("UPDATE validators SET fetched_at = ? WHERE url = ?", (time.time(), url))
+        else:
+            self.conn.execute(
+                "UPDATE validators SET etag = ?, last_modified = ?, fetched_at = ? WHERE url = ?",
+                (headers.get('etag'), headers.get('last-modified'), time.time(), url),
+            )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def stats(self):
+        return {
+            "validator_lookups": self.lookups,
+            "validator_hits": self.hits,
+            "validator_304s": self.not_modified,
+            "validator_expired": self.expired,
+            "validator_hit_ratio": self.hits / self.lookups if self.lookups else 0.0,
+        }
@@ -0,0 +1,123 @@
+import hashlib
+import os
+import time
+
+from cache_store import connect
+
+
+class LLMCacheMiss(Exception):
+    """Raised in replay mode when a prompt has no cached response."""
+
+
+class LLMCache:
+    """
+    On-disk LLM response cache keyed by model name + prompt hash.
+
+    LLM_CACHE_MODE selects the behaviour:
+      "on"     – read and write the cache (default)
+      "off"    – bypass it entirely
+      "replay" – read only and never call the network; misses raise LLMCacheMiss
+    Entries expire after LLM_CACHE_TTL_HOURS, and the least recently used ones
+    are evicted once the stored responses exceed LLM_CACHE_MAX_MB.
+    """
+
+    def __init__(self, filename="llm_responses.sqlite3", mode=None, ttl_hours=None, max_mb=None):
+        self.mode = (mode or os.environ.get("LLM_CACHE_MODE", "on")).lower()
+        self.ttl = (ttl_hours or float(os.environ.get("LLM_CACHE_TTL_HOURS", "72"))) * 3600
+        self.max_bytes = (max_mb or float(os.environ.get("LLM_CACHE_MAX_MB", "200"))) * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.evicted = 0
+        self.conn = None
+        if self.mode == "off":
+            return
+
+        self.conn = connect(filename)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                response TEXT,
+                size INTEGER,
+                created_at REAL,
+                last_used REAL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self.conn.commit()
+
+    @staticmethod
+    def key(model_name, prompt):
+        return hashlib.sha256(f"{model_name}\0{prompt}".encode('utf-8')).hexdigest()
+
+    def get(self, model_name, prompt):
+        """Returns the cached response text, or None (LLMCacheMiss in replay mode)."""
+        if self.conn is None:
+            return None
+        key = self.key(model_name, prompt)
+        row = self.conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+        if row and (self.mode == "replay" or time.time() - row[1] < self.ttl):
+            self.hits += 1
+            # Count what we didn't have to send or receive
+            self.bytes_saved += len(prompt.encode('utf-8')) + len(row[0].encode('utf-8'))
+            self.conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.conn.commit()
+            return row[0]
+        self.misses += 1
+        if self.mode == "replay":
+            raise LLMCacheMiss(f"No cached {model_name} response for prompt {key[:12]}")
+        return None
+
+    def put(self, model_name, prompt, response_text):
+        if self.conn is None or self.mode == "replay":
+            return
+        now = time.time()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+            (self.key(model_name, prompt), model_name, response_text, len(response_text.encode('utf-8')), now, now),
+        )
+        self.conn.commit()
+        self._evict()
+
+    def discard(self, model_name, prompt):
+        """Drops an entry, e.g. a response that turned out to be unusable."""
+        if self.conn is None or self.mode == "replay":
+            return
+        self.conn.execute("DELETE FROM responses WHERE key = ?", (self.key(model_name, prompt),))
+        self.conn.commit()
+
+    def _evict(self):
+        self.conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl,))
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            self.conn.commit()
+            return
+        # Drop least recently used rows until we're back under 90% of the budget
+        target = self.max_bytes * 0.9
+        for key, size in self.conn.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall():
+            if total <= target:
+                break
+            self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            self.evicted += 1
+        self.conn.commit()
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bytes_saved": self.bytes_saved,
+            "evicted": self.evicted,
+        }
+
+    def print_stats(self):
+        s = self.stats()
+        print(f"🗄️  LLM cache ({s['mode']}): {s['hits']} hits, {s['misses']} misses, "
+              f"{s['bytes_saved'] / 1024:.0f} KB saved, {s['evicted']} evicted")
@@ -0,0 +1,293 @@
+import asyncio
+import os
+import random
+import time
+from collections import deque
+
+import google.generativeai as genai
+
+try:
+    from google.api_core import exceptions as api_exceptions
+    _THROTTLE_ERRORS = (api_exceptions.ResourceExhausted, api_exceptions.ServiceUnavailable, api_exceptions.TooManyRequests)
+    _TRANSIENT_ERRORS = (api_exceptions.DeadlineExceeded, api_exceptions.InternalServerError, api_exceptions.GatewayTimeout)
+except ImportError:
+    _THROTTLE_ERRORS = ()
+    _TRANSIENT_ERRORS = ()
+
+from text_reduction import estimate_tokens
+
+# Rough output size of one verdict, charged against the tokens/minute bucket up front
+_EXPECTED_OUTPUT_TOKENS = 300
+
+
+def is_throttle_error(e):
+    if _THROTTLE_ERRORS and isinstance(e, _THROTTLE_ERRORS):
+        return True
+    text = str(e)
+    return '429' in text or '503' in text or 'quota' in text.lower() or 'rate limit' in text.lower()
+
+
+def is_transient_error(e):
+    return bool(_TRANSIENT_ERRORS) and isinstance(e, _TRANSIENT_ERRORS)
+
+
+class TokenBucket:
+    """Continuous-refill bucket holding at most `per_minute` units."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount=1):
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+class LatencyTracker:
+    """Rolling window of latencies with nearest-rank percentiles."""
+
+    def __init__(self, window=500):
+        self.samples = deque(maxlen=window)
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+
+    def percentile(self, p):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+class LLMClient:
+    """
+    Shared Gemini client for the whole run.
+
+    - One GenerativeModel per model name, reused across calls
+    - Token buckets for requests/minute (GEMINI_RPM) and tokens/minute (GEMINI_TPM)
+    - AIMD concurrency between GEMINI_MIN_CONCURRENCY and GEMINI_MAX_CONCURRENCY:
+      +1/limit per success, halved on 429/503
+    - Up to GEMINI_MAX_RETRIES retries with full-jitter exponential backoff on
+      throttling and transient server errors
+    - Optional hedging (GEMINI_HEDGE=true): a call still running after the observed
+      p95 latency gets a duplicate, the first answer wins and the other is cancelled.
+      Hedges are capped at GEMINI_HEDGE_BUDGET extra requests per primary request,
+      take their own concurrency slot and rate-limit tokens, and pause while the
+      concurrency limit is still below its starting value after a throttle.
+      A primary that loses to its hedge runs to completion on the hedge's slot, so
+      the stats compare the p99 callers saw with the p99 of the primaries alone.
+    """
+
+    # Calls observed before the p95 is trusted enough to hedge on
+    MIN_HEDGE_SAMPLES = 20
+
+    def __init__(self, rpm=None, tpm=None, min_concurrency=None, max_concurrency=None, max_retries=None):
+        self.requests = TokenBucket(rpm or int(os.environ.get("GEMINI_RPM", "900")))
+        self.tokens = TokenBucket(tpm or int(os.environ.get("GEMINI_TPM", "900000")))
+        self.min_concurrency = min_concurrency or int(os.environ.get("GEMINI_MIN_CONCURRENCY", "1"))
+        self.max_concurrency = max_concurrency or int(os.environ.get("GEMINI_MAX_CONCURRENCY", "16"))
+        self.max_retries = max_retries if max_retries is not None else int(os.environ.get("GEMINI_MAX_RETRIES", "4"))
+        self.limit = float(min(4, self.max_concurrency))
+        self.initial_limit = self.limit
+        self._in_flight = 0
+        self._cond = asyncio.Condition()
+        self._models = {}
+
+        self.calls = 0
+        self.failures = 0
+        self.throttle_events = 0
+        self.retries = 0
+        self.queue_wait_seconds = 0.0
+        self.max_queue_wait = 0.0
+        self.min_limit_seen = self.limit
+
+        self.hedging = os.environ.get("GEMINI_HEDGE", "false").lower() == "true"
+        self.hedge_budget = float(os.environ.get("GEMINI_HEDGE_BUDGET", "0.05"))
+        self.call_latency = LatencyTracker()
+        self.analysis_latency = LatencyTracker(window=100000)
+        self.answer_latency = LatencyTracker(window=100000)  # Per call, first answer (hedge or primary)
+        self.primary_latency = LatencyTracker(window=100000)  # Per call, the primary request alone
+        self._background = set()
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def model(self, model_name, **kwargs):
+        key = (model_name, repr(sorted(kwargs.items())))
+        if key not in self._models:
+            self._models[key] = genai.GenerativeModel(model_name, **kwargs)
+        return self._models[key]
+
+    async def _acquire_slot(self, prompt_tokens):
+        started = time.monotonic()
+        await self.requests.acquire(1)
+        await self.tokens.acquire(prompt_tokens + _EXPECTED_OUTPUT_TOKENS)
+        async with self._cond:
+            while self._in_flight >= int(self.limit):
+                await self._cond.wait()
+            self._in_flight += 1
+        waited = time.monotonic() - started
+        self.queue_wait_seconds += waited
+        self.max_queue_wait = max(self.max_queue_wait, waited)
+
+    async def _release_slot(self, throttled, completed=True):
+        """Frees a slot; AIMD grows the limit only on requests that completed (not cancelled hedges)."""
+        async with self._cond:
+            self._in_flight -= 1
+            if throttled:
+                self.limit = max(float(self.min_concurrency), self.limit / 2)
+                self.min_limit_seen = min(self.min_limit_seen, self.limit)
+            elif completed:
+                self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+    def _hedge_delay(self):
+        """
+        Seconds to wait before hedging, or None when hedging is off, unwarmed, out of budget,
+        backing off from a throttle, or without a free concurrency slot.
+        """
+        if not self.hedging or len(self.call_latency.samples) < self.MIN_HEDGE_SAMPLES:
+            return None
+        if self.hedges >= self.hedge_budget * max(self.calls, 1):
+            return None
+        if self.limit < self.initial_limit or self._in_flight >= int(self.limit):
+            return None
+        return self.call_latency.percentile(95)
+
+    async def _call(self, model, prompt, prompt_tokens):
+        """One attempt, hedged with a duplicate request once it runs past the p95."""
+        started = time.monotonic()
+        primary = asyncio.ensure_future(model.generate_content_async(prompt))
+        delay = self._hedge_delay()
+        if delay is None:
+            response = await primary
+            self._record_answer(started, primary_too=True)
+            return response
+
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or self._hedge_delay() is None:
+            response = await primary
+            self._record_answer(started, primary_too=True)
+            return response
+
+        # The hedge is a real request: it holds a slot and is charged to both buckets
+        self.hedges += 1
+        await self._acquire_slot(prompt_tokens)
+        hedge = asyncio.ensure_future(model.generate_content_async(prompt))
+        pending = {primary, hedge}
+        handed_off = False
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self._record_answer(started, primary_too=task is primary)
+                        if task is hedge:
+                            self.hedge_wins += 1
+                            if primary in pending:
+                                # The losing primary keeps the hedge's slot until it finishes
+                                pending.discard(primary)
+                                primary.add_done_callback(lambda _task: self._finish_primary(primary, started))
+                                handed_off = True
+                        return task.result()
+            # Both failed: surface the primary's error to the retry logic
+            return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            if not handed_off:
+                finished = hedge.done() and not hedge.cancelled()
+                hedge_error = hedge.exception() if finished else None
+                await self._release_slot(hedge_error is not None and is_throttle_error(hedge_error),
+                                         completed=finished and hedge_error is None)
+
+    def _record_answer(self, started, primary_too):
+        seconds = time.monotonic() - started
+        self.call_latency.add(seconds)
+        self.answer_latency.add(seconds)
+        if primary_too:
+            self.primary_latency.add(seconds)
+
+    def _finish_primary(self, primary, started):
+        """Done callback of a primary that lost to its hedge: records its latency and frees the slot it held."""
+        error = None if primary.cancelled() else primary.exception()
+        completed = not primary.cancelled() and error is None
+        if completed:
+            self.primary_latency.add(time.monotonic() - started)
+        release = asyncio.ensure_future(self._release_slot(error is not None and is_throttle_error(error),
+                                                           completed=completed))
+        self._background.add(release)
+        release.add_done_callback(self._background.discard)
+
+    async def generate(self, prompt, model_name, **model_kwargs):
+        """Returns the response text; raises the last error once retries are exhausted."""
+        prompt_tokens = estimate_tokens(prompt)
+        model = self.model(model_name, **model_kwargs)
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            await self._acquire_slot(prompt_tokens)
+            throttled = False
+            try:
+                self.calls += 1
+                response = await self._call(model, prompt, prompt_tokens)
+                self.analysis_latency.add(time.monotonic() - started)
+                return response.text
+            except Exception as e:
+                throttled = is_throttle_error(e)
+                if throttled:
+                    self.throttle_events += 1
+                if not (throttled or is_transient_error(e)) or attempt >= self.max_retries:
+                    self.failures += 1
+                    raise
+                attempt += 1
+                self.retries += 1
+                delay = random.uniform(0, min(30.0, 2.0 ** attempt))
+                print(f"  ⏳ Gemini {'throttled' if throttled else 'error'} ({e.__class__.__name__}), "
+                      f"retry {attempt}/{self.max_retries} in {delay:.1f}s")
+            finally:
+                await self._release_slot(throttled)
+            await asyncio.sleep(delay)
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "throttle_events": self.throttle_events,
+            "retries": self.retries,
+            "concurrency_limit": round(self.limit, 2),
+            "min_concurrency_limit": round(self.min_limit_seen, 2),
+            "queue_wait_seconds": round(self.queue_wait_seconds, 2),
+            "max_queue_wait_seconds": round(self.max_queue_wait, 2),
+            "hedging": self.hedging,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "latency_p50": self.analysis_latency.percentile(50),
+            "latency_p95": self.analysis_latency.percentile(95),
+            "latency_p99": self.analysis_latency.percentile(99),
+            "answer_p99": self.answer_latency.percentile(99),
+            "primary_p99": self.primary_latency.percentile(99),
+        }
+
+    def print_stats(self):
+        s = self.stats()
+        print(f"🛰️  Gemini client: {s['calls']} call(s), {s['failures']} failed, {s['throttle_events']} throttled, "
+              f"{s['retries']} retried | concurrency limit {s['concurrency_limit']} (low {s['min_concurrency_limit']})")
+        print(f"   Queue wait: {s['queue_wait_seconds']}s total, {s['max_queue_wait_seconds']}s max")
+        if s['latency_p50'] is not None:
+            print(f"   Analysis latency (hedging {'on' if s['hedging'] else 'off'}): "
+                  f"p50 {s['latency_p50']:.2f}s, p95 {s['latency_p95']:.2f}s, p99 {s['latency_p99']:.2f}s"
+                  + (f" | {s['hedges']} hedge(s), {s['hedge_wins']} won" if s['hedging'] else ""))
+        if s['hedging'] and s['answer_p99'] is not None and s['primary_p99'] is not None:
+            print(f"   Call p99: {s['answer_p99']:.2f}s answered vs {s['primary_p99']:.2f}s for the primaries alone "
+                  f"(what the run would have waited without hedging)")
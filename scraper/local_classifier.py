@@ -0,0 +1,239 @@
+"""
+Small local status classifier trained on historical Gemini verdicts.
+
+Training (reads the `clinics` collection of the DATASTORE_BACKEND data store;
+Firestore by default, which needs serviceAccountKey.json):
+    python scraper/local_classifier.py train [--holdout 0.2] [--epochs 30]
+
+The model is hashed word uni/bi-gram features + multinomial logistic regression,
+stored as JSON in the scraper cache, and runs CPU-only in pure Python.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import sys
+import zlib
+from collections import Counter, defaultdict
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from cache_store import cache_path
+from datastore import open_datastore
+from text_reduction import STATUS_PATTERNS
+
+LABELS = ["OPEN", "CLOSED", "WAITLIST", "UNCERTAIN"]
+N_FEATURES = 1 << 18
+_TOKEN = re.compile(r"[a-zà-ÿ']+|\d+", re.IGNORECASE)
+_SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+|\n+')
+_CANDIDATE_PATTERNS = [pattern for pattern, weight in STATUS_PATTERNS if weight >= 5]
+
+
+def featurize(text):
+    """Hashed, L2-normalized word unigram + bigram counts as {index: value}."""
+    tokens = [t.lower() for t in _TOKEN.findall(text)]
+    grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    counts = Counter(zlib.crc32(g.encode('utf-8')) % N_FEATURES for g in grams)
+    norm = math.sqrt(sum(v * v for v in counts.values())) or 1.0
+    return {i: v / norm for i, v in counts.items()}
+
+
+def _softmax(scores):
+    top = max(scores)
+    exps = [math.exp(s - top) for s in scores]
+    total = sum(exps)
+    return [e / total for e in exps]
+
+
+class LocalClassifier:
+    """Multinomial logistic regression over hashed n-grams."""
+
+    def __init__(self, weights=None, bias=None):
+        self.weights = weights or [defaultdict(float) for _ in LABELS]
+        self.bias = bias or [0.0] * len(LABELS)
+
+    def probabilities(self, features):
+        scores = [self.bias[k] + sum(self.weights[k].get(i, 0.0) * v for i, v in features.items())
+                  for k in range(len(LABELS))]
+        return _softmax(scores)
+
+    def predict_sentence(self, sentence):
+        probs = self.probabilities(featurize(sentence))
+        best = max(range(len(LABELS)), key=lambda k: probs[k])
+        return LABELS[best], probs[best]
+
+    def predict(self, text):
+        """
+        Scores each status-bearing sentence of a clinic's text and returns the most
+        confident non-UNCERTAIN one as {'status', 'confidence', 'evidence'}.
+        """
+        best = {"status": None, "confidence": 0.0, "evidence": None}
+        for sentence in _SENTENCE_SPLIT.split(text):
+            if len(sentence) > 600 or not any(p.search(sentence) for p in _CANDIDATE_PATTERNS):
+                continue
+            status, confidence = self.predict_sentence(sentence)
+            if status != "UNCERTAIN" and confidence > best["confidence"]:
+                best = {"status": status, "confidence": round(confidence, 3), "evidence": sentence.strip()}
+        return best
+
+    def fit(self, examples, epochs=30, learning_rate=0.5, l2=1e-4, seed=13):
+        """SGD on [(text, label)]."""
+        rng = random.Random(seed)
+        data = [(featurize(text), LABELS.index(label)) for text, label in examples]
+        for epoch in range(epochs):
+            rng.shuffle(data)
+            lr = learning_rate / (1 + epoch * 0.1)
+            for features, y in data:
+                probs = self.probabilities(features)
+                for k in range(len(LABELS)):
+                    grad = probs[k] - (1.0 if k == y else 0.0)
+                    if grad == 0.0:
+                        continue
+                    w = self.weights[k]
+                    for i, v in features.items():
+                        w[i] -= lr * (grad * v + l2 * w.get(i, 0.0))
+                    self.bias[k] -= lr * grad
+        return self
+
+    def save(self, path):
+        payload = {
+            "labels": LABELS,
+            "n_features": N_FEATURES,
+            "bias": self.bias,
+            "weights": [{str(i): round(w, 6) for i, w in ws.items() if abs(w) > 1e-6} for ws in self.weights],
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            payload = json.load(f)
+        if payload["labels"] != LABELS or payload["n_features"] != N_FEATURES:
+            raise ValueError("Model was trained with a different label set or feature size")
+        weights = [{int(i): w for i, w in ws.items()} for ws in payload["weights"]]
+        return cls(weights=weights, bias=payload["bias"])
+
+
+class LocalModelGate:
+    """
+    Inference path used by the scraper: loads the trained model if present and
+    accepts its verdict when confidence ≥ LOCAL_MODEL_THRESHOLD. Agreement with
+    Gemini is counted whenever both ran on the same clinic.
+    """
+
+    def __init__(self, path=None, threshold=None):
+        self.path = path or os.environ.get("LOCAL_MODEL_PATH", cache_path("status_model.json"))
+        self.threshold = threshold if threshold is not None else float(os.environ.get("LOCAL_MODEL_THRESHOLD", "0.9"))
+        self.model = None
+        self.decided = 0
+        self.compared = 0
+        self.agreed = 0
+        if os.path.exists(self.path) and os.environ.get("LOCAL_MODEL_ENABLED", "true").lower() == "true":
+            try:
+                self.model = LocalClassifier.load(self.path)
+                print(f"✅ Local status model loaded from {self.path}")
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Could not load local status model: {e}")
+
+    def predict(self, text):
+        if not self.model:
+            return {"status": None, "confidence": 0.0, "evidence": None}
+        return self.model.predict(text)
+
+    def is_confident(self, verdict):
+        if verdict["status"] is not None and verdict["confidence"] >= self.threshold:
+            self.decided += 1
+            return True
+        return False
+
+    def record_agreement(self, verdict, llm_result):
+        if verdict["status"] is None or llm_result.get("status") in (None, "ERROR"):
+            return
+        self.compared += 1
+        self.agreed += verdict["status"] == llm_result.get("status")
+
+    def print_stats(self):
+        if not self.model:
+            return
+        agreement = f"{self.agreed / self.compared:.0%}" if self.compared else "n/a"
+        print(f"🤖 Local model (threshold {self.threshold}): decided {self.decided} | "
+              f"agreement with Gemini: {agreement} over {self.compared}")
+
+
+def _holdout(doc_id, fraction):
+    """Stable train/test split by document id."""
+    return int(hashlib.md5(doc_id.encode('utf-8')).hexdigest(), 16) % 1000 < fraction * 1000
+
+
+async def load_examples(store):
+    """(clinic_id, evidence, status) for every clinic with a labelled verdict and real evidence."""
+    examples = []
+    async for doc_id, data in store.clinics.scan(fields=['status', 'evidence']):
+        status = data.get('status')
+        evidence = (data.get('evidence') or '').strip()
+        if status in LABELS and evidence and evidence != 'N/A':
+            examples.append((doc_id, evidence, status))
+    return examples
+
+
+async def _load_training_examples():
+    store = open_datastore()
+    try:
+        return await load_examples(store)
+    finally:
+        await store.close()
+
+
+def train(argv):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Train the local clinic status classifier")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Fraction of clinics held out for evaluation")
+    parser.add_argument("--epochs", type=int, default=30)
+    parser.add_argument("--out", default=cache_path("status_model.json"))
+    args = parser.parse_args(argv)
+
+    examples = asyncio.run(_load_training_examples())
+    train_set = [(text, label) for doc_id, text, label in examples if not _holdout(doc_id, args.holdout)]
+    test_set = [(text, label) for doc_id, text, label in examples if _holdout(doc_id, args.holdout)]
+    print(f"📋 {len(examples)} labelled verdicts: {len(train_set)} train / {len(test_set)} held out")
+    print(f"   Label mix: {dict(Counter(label for _, _, label in examples))}")
+    if not train_set:
+        print("❌ Nothing to train on.")
+        return
+
+    model = LocalClassifier().fit(train_set, epochs=args.epochs)
+
+    if test_set:
+        correct = Counter()
+        total = Counter()
+        confident = confident_correct = 0
+        for text, label in test_set:
+            predicted, confidence = model.predict_sentence(text)
+            total[label] += 1
+            correct[label] += predicted == label
+            if confidence >= 0.9:
+                confident += 1
+                confident_correct += predicted == label
+        accuracy = sum(correct.values()) / len(test_set)
+        print(f"📊 Held-out accuracy vs Gemini: {accuracy:.1%}")
+        for label in LABELS:
+            if total[label]:
+                print(f"   {label:<10} {correct[label]}/{total[label]}")
+        if confident:
+            print(f"   At confidence ≥ 0.9: {confident_correct}/{confident} correct "
+                  f"({confident / len(test_set):.0%} coverage)")
+
+    model.save(args.out)
+    print(f"💾 Model saved to {args.out}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "train":
+        print(__doc__)
+        sys.exit(1)
+    train(sys.argv[2:])
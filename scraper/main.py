@@ -1,24 +1,51 @@
 import asyncio
 import os
+import sys
 import json
+import time
+import hashlib
+from datetime import datetime
 import google.generativeai as genai
-from playwright.async_api import async_playwright
 from urllib.parse import urlparse
 
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from browser_pool import BrowserPool
+from scheduler import CrawlScheduler
+from pipeline import Pipeline, Stage
+from fetcher import StaticFetcher
+from fingerprint import FingerprintGate, fingerprint
+from llm_cache import LLMCache
+from resource_blocker import ResourceBlocker
+from text_reduction import TextReducer, estimate_tokens
+from boilerplate import BoilerplateFilter
+from rules import RuleEngine
+from local_classifier import LocalModelGate
+from batch_analyzer import BatchAnalyzer
+from delta import DeltaAnalyzer
+from run_journal import RunJournal
+from result_sinks import ResultSinks
+from clinic_snapshot import ClinicSnapshot
+from firestore_writer import FirestoreWriter
+from datastore import open_datastore
+from subscription_index import SubscriptionIndex
+from llm_client import LLMClient
+from model_router import ModelRouter
+from verdict_schema import (BATCH_VERDICT_SCHEMA, VERDICT_SCHEMA, VerdictError, VerdictValidator,
+                            build_reask_prompt, parse_json_response, repair_verdict)
+
 # Configure Gemini
 # Ensure GEMINI_API_KEY is set in your environment variables
 genai.configure(api_key=os.environ.get("GEMINI_API_KEY"))
 
-async def analyze_clinic_status(text):
-    """
-    Analyzes the provided text using Gemini to determine if the clinic is accepting new patients.
-    Enhanced to extract languages as an array.
-    """
-    try:
-        model = genai.GenerativeModel('gemini-flash-latest')
-        prompt = f"""
-        Analyze the following text from a clinic's website (potentially from multiple pages including 'Contact', 'About', 'New Patients', 'Team') and extract the following information.
-        
+MODEL_NAME = 'gemini-flash-latest'
+
+# Shared, rate-limited Gemini client (one model instance per model name)
+llm_client = LLMClient()
+verdict_validator = VerdictValidator()
+# Cheapest-first model tiers from model_routing.json (MODEL_ROUTING_FILE)
+model_router = ModelRouter(default_model=MODEL_NAME)
+
+ANALYSIS_INSTRUCTIONS = """
         CRITICAL INSTRUCTIONS FOR STATUS:
         - "OPEN": ONLY if the text EXPLICITLY states they are currently accepting new patients for family practice/primary care (e.g., "Accepting new patients", "Register now", "New patients welcome").
         - "WAITLIST": If they are accepting registrations ONLY for a waitlist.
@@ -33,9 +60,9 @@ async def analyze_clinic_status(text):
         - If NO specific languages are mentioned, default to ["English"].
         - Format as a JSON array of strings: ["English", "French", "Mandarin"]
         - Common languages to look for: English, French, Mandarin, Cantonese, Spanish, Arabic, Punjabi, Urdu, Hindi, Tamil, etc.
+"""
 
-        Respond ONLY with a JSON object in the following format:
-        {{
+VERDICT_FORMAT = """{
             "clinic_name": "Name of the clinic",
             "address": "Full address if available",
             "district": "City or neighborhood (e.g. Toronto, Scarborough)",
@@ -45,45 +72,227 @@ async def analyze_clinic_status(text):
             "status": "OPEN", "CLOSED", "WAITLIST", or "UNCERTAIN",
             "reason": "Brief explanation of why",
             "evidence": "The EXACT sentence or phrase from the text that led to this decision"
-        }}
+        }"""
+
+def build_prompt(text):
+    return f"""
+        Analyze the following text from a clinic's website (potentially from multiple pages including 'Contact', 'About', 'New Patients', 'Team') and extract the following information.
+        {ANALYSIS_INSTRUCTIONS}
+        Respond ONLY with a JSON object in the following format:
+        {VERDICT_FORMAT}
 
         Text Context (from multiple pages):
         {text[:25000]}
         """
-        response = await model.generate_content_async(prompt)
-        
-        # Clean up response to ensure it's valid JSON
-        response_text = response.text.strip()
-        if response_text.startswith("```json"):
-            response_text = response_text[7:-3]
-        elif response_text.startswith("```"):
-            response_text = response_text[3:-3]
-        
-        result = json.loads(response_text)
-        
-        # Ensure languages is always an array
-        if 'languages' in result:
-            if isinstance(result['languages'], str):
-                # Convert string to array
-                result['languages'] = [lang.strip() for lang in result['languages'].split(',')]
-        else:
-            result['languages'] = ['English']
-            
+
+def build_batch_prompt(items):
+    """Prompt for several clinics at once; items are (clinic_id, text) pairs."""
+    sections = "\n".join(
+        f"\n        ##### CLINIC clinic_id={clinic_id} #####\n{text[:25000]}\n" for clinic_id, text in items
+    )
+    return f"""
+        Analyze the following texts, each from a different clinic's website (potentially from multiple pages including 'Contact', 'About', 'New Patients', 'Team'), and extract the following information for EACH clinic independently.
+        {ANALYSIS_INSTRUCTIONS}
+        Respond ONLY with a JSON array containing one object per clinic, in the following format, with an extra "clinic_id" field copied exactly from the clinic's header:
+        [{VERDICT_FORMAT}]
+
+        Clinic texts:
+        {sections}
+        """
+
+def build_delta_prompt(previous, removed, added):
+    """Prompt for a clinic whose page changed slightly: the previous verdict plus the changed blocks only."""
+    previous = {k: v for k, v in previous.items() if k in VERDICT_SCHEMA["properties"]}
+    return f"""
+        A clinic's website (pages including 'Contact', 'About', 'New Patients', 'Team') was analyzed before. Since then, only the text blocks below changed.
+        Decide whether these changes affect the analysis, in particular whether the clinic's status changed, and return the updated analysis.
+        Keep every field of the previous analysis that the changes don't affect.
+        {ANALYSIS_INSTRUCTIONS}
+        Respond ONLY with a JSON object in the following format:
+        {VERDICT_FORMAT}
+
+        Previous analysis:
+        {json.dumps(previous, ensure_ascii=False)}
+
+        Removed text:
+        {chr(10).join(removed)[:10000] or "(none)"}
+
+        Added text:
+        {chr(10).join(added)[:10000] or "(none)"}
+        """
+
+async def generate_text(prompt, cache=None, model_name=MODEL_NAME, schema=None):
+    """
+    Returns Gemini's raw response text, served from / stored in `cache` when given.
+    With a `schema`, Gemini is asked for schema-constrained JSON output.
+    """
+    response_text = cache.get(model_name, prompt) if cache else None
+    if response_text is None:
+        generation_config = None
+        if schema:
+            generation_config = {"response_mime_type": "application/json", "response_schema": schema}
+        started = time.monotonic()
+        response_text = await llm_client.generate(prompt, model_name, generation_config=generation_config)
+        model_router.record(model_name, time.monotonic() - started, prompt, response_text)
+        if cache:
+            cache.put(model_name, prompt, response_text)
+    return response_text
+
+async def analyze_clinic_batch(items, cache=None):
+    """Analyzes several clinics in one request; returns the array of verdicts that pass validation."""
+    # Batches mix easy and hard clinics, so they always go to the strongest tier
+    response = parse_json_response(await generate_text(
+        build_batch_prompt(items), cache, model_router.strongest, schema=BATCH_VERDICT_SCHEMA))
+    if not isinstance(response, list):
+        return response
+    verdicts = []
+    for item in response:
+        try:
+            verdict, _ = repair_verdict(item)
+        except VerdictError:
+            continue  # BatchAnalyzer falls back to a per-clinic call for this clinic
+        verdicts.append(verdict)
+    return verdicts
+
+async def analyze_with_model(prompt, cache, model_name):
+    """
+    One validated verdict from `model_name`: small defects are repaired locally and
+    only an unusable answer triggers one targeted re-ask. Raises VerdictError if that fails too.
+    """
+    response_text = await generate_text(prompt, cache, model_name, schema=VERDICT_SCHEMA)
+    result, error = verdict_validator.check(response_text)
+    if error:
+        print(f"  ⚠️ Unusable analysis ({error}), re-asking")
+        if cache:
+            cache.discard(model_name, prompt)
+        verdict_validator.reasked += 1
+        reask_prompt = build_reask_prompt(prompt, response_text, error)
+        response_text = await generate_text(reask_prompt, cache, model_name, schema=VERDICT_SCHEMA)
+        result, error = verdict_validator.check(response_text)
+        if error:
+            if cache:
+                cache.discard(model_name, reask_prompt)
+            verdict_validator.failed += 1
+            raise VerdictError(error)
+        verdict_validator.recovered += 1
+    return result
+
+async def analyze_clinic_status(text, cache=None, prompt=None):
+    """
+    Analyzes the provided text using Gemini to determine if the clinic is accepting new patients.
+    Enhanced to extract languages as an array. Responses are served from / stored in `cache` when given.
+    Output is requested as schema-constrained JSON (see analyze_with_model).
+    The model is picked by model_router from `text` and escalated to a stronger tier on an
+    uncertain, conflicting or unusable answer. A ready-made `prompt` replaces the default one.
+    """
+    try:
+        prompt = prompt or build_prompt(text)
+        decision = model_router.route(text or "")
+        while True:
+            try:
+                result = await analyze_with_model(prompt, cache, decision['model'])
+            except VerdictError as e:
+                if model_router.escalate(decision, error=e):
+                    continue
+                raise
+            if not model_router.escalate(decision, result):
+                break
+            print(f"  ⬆️  Escalating to {decision['model']} ({decision['escalations'][-1]['reason']})")
+        model_router.finish(decision, result)
         return result
     except Exception as e:
         return {"status": "ERROR", "reason": f"Analysis failed: {str(e)}", "languages": ["English"]}
 
-async def crawl_clinic(url):
+async def analyze_clinic_delta(previous, removed, added, cache=None):
+    """Re-analyzes a clinic from its previous verdict and the text blocks that changed since (routed on the added text)."""
+    return await analyze_clinic_status("\n".join(added), cache, prompt=build_delta_prompt(previous, removed, added))
+
+# Keywords to find relevant sub-pages
+KEYWORDS = ['contact', 'about', 'doctors', 'team', 'new-patient', 'register', 'physician', 'staff', 'services']
+
+def select_subpage_links(url, links, visited_urls):
+    """Picks up to 3 internal links whose URL or text mentions a relevant keyword."""
+    # Filter links: must be internal (same domain) and contain keywords
+    base_domain = urlparse(url).netloc
+    relevant_links = []
+
+    for link in links:
+        href = link['href']
+        text = link['text']
+
+        # Skip invalid links
+        if not href or href.startswith('javascript') or href.startswith('mailto') or href.startswith('tel'):
+            continue
+
+        parsed_href = urlparse(href)
+        if parsed_href.netloc and parsed_href.netloc != base_domain:
+            continue  # Skip external links
+
+        # Check keywords in URL or Link Text
+        if any(kw in href.lower() or kw in text for kw in KEYWORDS):
+            # Normalize URL (remove fragments)
+            full_url = href.split('#')[0]
+            if full_url not in visited_urls and full_url not in relevant_links:
+                relevant_links.append(full_url)
+
+    # Limit to top 3 links
+    return relevant_links[:3]
+
+async def crawl_clinic(url, pool=None, fetcher=None):
     """
     Deep research: Crawls the main URL and up to 3 relevant sub-pages to gather comprehensive context.
+    Tries the static HTTP fetcher first when given one, and escalates to Playwright if the
+    main page or a sub-page is unreachable or JS-rendered; a static success or a JS-rendered
+    page is remembered per domain, a transient HTTP error is not.
     """
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        context = await browser.new_context(user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-        
-        # Keywords to find relevant sub-pages
-        KEYWORDS = ['contact', 'about', 'doctors', 'team', 'new-patient', 'register', 'physician', 'staff', 'services']
-        
+    if fetcher and fetcher.should_try_static(url):
+        combined_text = await crawl_clinic_static(url, fetcher)
+        if combined_text:
+            fetcher.record(url, "static")
+            return combined_text
+        print(f"  ⤴️  Escalating to browser: {url}")
+
+    return await crawl_clinic_browser(url, pool)
+
+async def crawl_clinic_static(url, fetcher):
+    """
+    Static variant of the crawl: plain HTTP + HTML-to-text, no browser.
+    Returns None, after recording the escalation, if the main page or any sub-page failed,
+    so the browser crawl reads the same pages instead of a partial static one.
+    """
+    print(f"  ⚡ Main: {url}")
+    main_page = await fetcher.fetch(url)
+    if not main_page:
+        fetcher.escalate(url)
+        return None
+
+    main_content, links = main_page
+    combined_text = f"\n=== MAIN PAGE ({url}) ===\n{main_content}\n"
+
+    targets = select_subpage_links(url, links, {url})
+    if targets:
+        print(f"  📄 Sub-pages: {len(targets)} found")
+        sub_pages = await asyncio.gather(*(fetcher.fetch(target_url) for target_url in targets))
+        failed = [target_url for target_url, sub_page in zip(targets, sub_pages) if not sub_page]
+        if failed:
+            print(f"  ⚠️ {len(failed)} sub-page(s) failed statically")
+            fetcher.escalate(url, failed)
+            return None
+        for target_url, sub_page in zip(targets, sub_pages):
+            combined_text += f"\n=== SUB-PAGE ({target_url}) ===\n{sub_page[0]}\n"
+
+    return combined_text
+
+async def crawl_clinic_browser(url, pool=None):
+    """
+    Playwright variant of the crawl.
+    Uses a fresh context from the shared browser pool; a one-browser pool is started if none is given.
+    """
+    if pool is None:
+        async with BrowserPool(size=1, contexts_per_browser=1) as own_pool:
+            return await crawl_clinic_browser(url, own_pool)
+
+    async with pool.context(site_url=url) as context:
         combined_text = ""
         visited_urls = set()
         
@@ -104,31 +313,7 @@ async def crawl_clinic(url):
                 }))
             """)
             
-            # Filter links: must be internal (same domain) and contain keywords
-            base_domain = urlparse(url).netloc
-            relevant_links = []
-            
-            for link in links:
-                href = link['href']
-                text = link['text']
-                
-                # Skip invalid links
-                if not href or href.startswith('javascript') or href.startswith('mailto') or href.startswith('tel'):
-                    continue
-                    
-                parsed_href = urlparse(href)
-                if parsed_href.netloc and parsed_href.netloc != base_domain:
-                    continue  # Skip external links
-                
-                # Check keywords in URL or Link Text
-                if any(kw in href.lower() or kw in text for kw in KEYWORDS):
-                    # Normalize URL (remove fragments)
-                    full_url = href.split('#')[0]
-                    if full_url not in visited_urls and full_url not in relevant_links:
-                        relevant_links.append(full_url)
-            
-            # Limit to top 3 links
-            targets = relevant_links[:3]
+            targets = select_subpage_links(url, links, visited_urls)
             
             if targets:
                 print(f"  📄 Sub-pages: {len(targets)} found")
@@ -151,8 +336,6 @@ async def crawl_clinic(url):
         except Exception as e:
             print(f"  ❌ Error crawling {url}: {e}")
             return combined_text if combined_text else None
-        finally:
-            await browser.close()
 
 async def fetch_page_text(context, url):
     """Helper to fetch text from a single page"""
@@ -200,68 +383,81 @@ def check_preferences(result):
 
     return True
 
-# Initialize Firebase Global
-db = None
+# Data store (DATASTORE_BACKEND): Firestore by default, or the emulator, sqlite or in-memory
+store = None
 notifier = None
 
 try:
-    import firebase_admin
-    from firebase_admin import credentials
-    from firebase_admin import firestore
-    from datetime import datetime
+    from zoneinfo import ZoneInfo
+except ImportError:
+    from backports.zoneinfo import ZoneInfo
+
+KEY_PATHS = ("serviceAccountKey.json", "../serviceAccountKey.json")
+_backend = os.environ.get("DATASTORE_BACKEND", "firestore").lower()
+
+if _backend == "firestore" and not any(os.path.exists(p) for p in KEY_PATHS):
+    print("⚠️ serviceAccountKey.json not found. Firestore updates disabled.")
+else:
     try:
-        from zoneinfo import ZoneInfo
-    except ImportError:
-        from backports.zoneinfo import ZoneInfo
+        store = open_datastore(_backend, key_paths=KEY_PATHS)
+        print(f"✅ Data store initialized ({store.backend})")
 
-    # Check for service account key
-    key_path = "serviceAccountKey.json"
-    if not os.path.exists(key_path):
-        key_path = "../serviceAccountKey.json"
-    
-    if os.path.exists(key_path):
-        if not firebase_admin._apps:
-            cred = credentials.Certificate(key_path)
-            firebase_admin.initialize_app(cred)
-        db = firestore.client()
-        print("✅ Firebase initialized successfully")
-        
-        # Initialize notifier with Firestore client
         try:
-            import sys
-            sys.path.append(os.path.dirname(os.path.abspath(__file__)))
             from notifications import NotificationManager
-            notifier = NotificationManager(db=db)
-            print("✅ NotificationManager initialized with Firestore logging")
+            notifier = NotificationManager()
+            print("✅ NotificationManager initialized")
         except ImportError as e:
             print(f"⚠️ Failed to import NotificationManager: {e}")
-    else:
-        print("⚠️ serviceAccountKey.json not found. Firestore updates disabled.")
+    except ImportError:
+        print("⚠️ firebase-admin not installed. Firestore updates disabled.")
 
-except ImportError:
-    print("⚠️ firebase-admin not installed. Firestore updates disabled.")
+def clinic_doc_id(url, data):
+    """Firestore doc id of a clinic: the seed ID if available, else derived from the URL."""
+    doc_id = data.get('id')
+    if not doc_id:
+        doc_id = url.replace("https://", "").replace("http://", "").replace("/", "_").replace(".", "_")
+    return doc_id
+
+# Unchanged checks go to sharded clinicChecks docs, outside the `clinics` listener path
+CHECK_SHARDS = int(os.environ.get("CLINIC_CHECK_SHARDS", "16"))
 
-async def update_clinic_in_firestore(url, data):
-    """Updates a single clinic in Firestore immediately and returns old status"""
-    if not db:
+async def record_clinic_check(doc_id, check, writer=None):
+    """Records lastChecked/fingerprint/status of one clinic in its clinicChecks shard (one map field per clinic)."""
+    shard = f"shard-{int(hashlib.md5(doc_id.encode('utf-8')).hexdigest(), 16) % CHECK_SHARDS:02d}"
+    if writer:
+        writer.set('clinicChecks', shard, {doc_id: check})
+    else:
+        await store.set('clinicChecks', shard, {doc_id: check})
+
+async def update_clinic_in_firestore(url, data, snapshot=None, writer=None):
+    """
+    Updates a single clinic in Firestore and returns old status.
+    The check itself (lastChecked, fingerprint) always goes to clinicChecks. The clinic doc is
+    only written when its fields change: just the changed fields plus updatedAt are written,
+    diffed against the preloaded ClinicSnapshot or else the doc just read, so a reused verdict
+    still repairs a missing or stale doc.
+    The old status also comes from the snapshot instead of a doc read when one is given,
+    and with a FirestoreWriter writes are queued for a background batch instead of sent inline.
+    """
+    if not store:
         return None
 
     try:
-        collection_ref = db.collection('clinics')
-        
         # Use ID from seed data if available
-        doc_id = data.get('id')
-        if not doc_id:
-            doc_id = url.replace("https://", "").replace("http://", "").replace("/", "_").replace(".", "_")
-
-        doc_ref = collection_ref.document(doc_id)
+        doc_id = clinic_doc_id(url, data)
         
         # Get old status before updating
-        old_doc = doc_ref.get()
-        old_status = old_doc.to_dict().get('status') if old_doc.exists else None
+        old_doc = None
+        if snapshot is not None:
+            old_status = snapshot.status(doc_id)
+        else:
+            old_doc = await store.clinics.get(doc_id)
+            old_status = old_doc.get('status') if old_doc else None
         
         toronto_time = datetime.now(ZoneInfo("America/Toronto"))
-        
+        await record_clinic_check(doc_id, {"lastChecked": toronto_time, "fingerprint": data.get('fingerprint'),
+                                     "status": data.get('status', 'UNKNOWN')}, writer)
+
         # Ensure languages is stored as an array in Firestore
         languages = data.get('languages', ['English'])
         if isinstance(languages, str):
@@ -273,17 +469,31 @@ async def update_clinic_in_firestore(url, data):
             "district": data.get('district', 'N/A'),
             "phone": data.get('phone_number', 'N/A'),
             "status": data.get('status', 'UNKNOWN'),
-            "updatedAt": toronto_time,
             "url": url,
             "vacancy": data.get('remaining_vacancy', 'N/A'),
             "languages": languages,  # Store as array
             "evidence": data.get('evidence', 'N/A'),
             "reason": data.get('reason', 'N/A'),  # Added missing reason field
-            "province": data.get('province', 'N/A')
+            "province": data.get('province', 'N/A'),
         }
+        # A reused verdict still reconciles the doc: a missing doc, failed write or manual edit is repaired
+        if snapshot is not None:
+            doc_data = snapshot.diff(doc_id, doc_data)
+        elif old_doc is not None:
+            doc_data = {k: v for k, v in doc_data.items() if old_doc.get(k) != v}
+        if not doc_data:
+            print(f"   🔥 Firestore: {data.get('status')} (no field changed, check recorded)")
+            return old_status
+        doc_data["updatedAt"] = toronto_time
         
-        doc_ref.set(doc_data, merge=True)
-        print(f"   🔥 Firestore: {data.get('status')} | Languages: {', '.join(languages)}")
+        if writer:
+            writer.set('clinics', doc_id, doc_data)
+        else:
+            await store.clinics.set(doc_id, doc_data)
+        if snapshot is not None:
+            snapshot.update(doc_id, doc_data)
+        print(f"   🔥 Firestore: {data.get('status')} | Languages: {', '.join(languages)} "
+              f"| {len(doc_data) - 1} field(s) changed")
         
         return old_status
         
@@ -291,66 +501,27 @@ async def update_clinic_in_firestore(url, data):
         print(f"   ❌ Firestore error: {e}")
         return None
 
-async def send_alert_batch(clinic_name, clinic_url, clinic_city, clinic_languages, old_status=None):
+async def send_alert_batch(clinic_name, clinic_url, clinic_city, clinic_languages, old_status=None, subscriptions=None):
     """
     Send SMS alerts to all premium users who have selected this clinic's location.
     Only sends for status flips (CLOSED/WAITLIST → OPEN).
+    Recipients come from `subscriptions` (a run-wide SubscriptionIndex), or a fresh one if not given.
     """
-    if not db or not notifier:
+    if not store or not notifier:
         print(f"  📧 Alert batch skipped (DB or notifier not available)")
         return
     
     try:
-        # Query all premium users
-        users_ref = db.collection('users')
-        premium_users = users_ref.where('isPremium', '==', True).stream()
-        
         alert_count = 0
         
-        for user_doc in premium_users:
-            user_data = user_doc.to_dict()
-            user_id = user_doc.id
-            user_areas = user_data.get('areas', [])
-            user_languages = user_data.get('languages', [])
-            user_phone = user_data.get('phoneNumber')  # Fixed: was 'phone', should be 'phoneNumber'
-            
-            # Skip if no phone number
-            if not user_phone:
-                continue
-            
-            # Check if user has selected this location
-            location_match = False
-            if user_areas:
-                for area in user_areas:
-                    # Match logic:
-                    # 1. Exact city match (e.g., user=Toronto, clinic=Toronto)
-                    # 2. User selected "Ontario Wide" or "All Locations" (matches any clinic)
-                    # 3. Clinic is "Ontario Wide" (matches any ON city like Toronto, Mississauga, etc.)
-                    # 4. Partial match (clinic city contains user area or vice versa)
-                    if (area.lower() == clinic_city.lower() or 
-                        'ontario wide' in area.lower() or 
-                        'all locations' in area.lower() or
-                        'ontario wide' in clinic_city.lower() or  # Clinic is Ontario-wide, matches any ON user
-                        clinic_city.lower() in area.lower() or
-                        area.lower() in clinic_city.lower()):
-                        location_match = True
-                        break
-            
-            if not location_match:
-                continue
-            
-            # Check language match (if user has language preferences)
-            language_match = True
-            if user_languages and clinic_languages:
-                language_match = any(
-                    any(user_lang.lower() in clinic_lang.lower() 
-                        for clinic_lang in clinic_languages)
-                    for user_lang in user_languages
-                )
-            
-            if not language_match:
-                continue
-            
+        # Premium users are indexed once per run; matching is a set intersection per flip
+        # Location: exact/partial city match, "Ontario Wide"/"All Locations" users, or an Ontario-wide clinic
+        # Language: any user language contained in a clinic language (if both are set)
+        if subscriptions is None:
+            subscriptions = SubscriptionIndex(store)
+        await subscriptions.load()
+        
+        for user_id, user_phone in subscriptions.recipients(clinic_city, clinic_languages):
             # Send SMS to this user
             # Include status flip information if available
             status_info = ""
@@ -373,14 +544,14 @@ async def send_alert_batch(clinic_name, clinic_url, clinic_city, clinic_language
                     alert_count += 1
                     
                     # Log to Firestore
-                    db.collection('notifications').add({
+                    await store.notifications.add({
                         'clinicName': clinic_name,
                         'clinicUrl': clinic_url,
                         'userId': user_id,
                         'phone': user_phone,
                         'type': 'STATUS_FLIP_ALERT',
                         'sid': sms_message.sid,
-                        'timestamp': firestore.SERVER_TIMESTAMP
+                        'timestamp': store.server_timestamp()
                     })
                 else:
                     print(f"  [LOG ONLY] Would send to {user_phone}: {msg}")
@@ -397,7 +568,133 @@ async def send_alert_batch(clinic_name, clinic_url, clinic_city, clinic_language
     except Exception as e:
         print(f"  ❌ Error in send_alert_batch: {e}")
 
-async def main():
+async def crawl_stage(job, pool, fetcher=None):
+    """Crawl stage: fills job['text'] or marks the job as failed."""
+    url = job['url']
+    print(f"\n🕷️  Crawling: {url}")
+    # Use deep research crawling
+    job['text'] = await crawl_clinic(url, pool, fetcher)
+    if not job['text']:
+        print(f"  ❌ Failed to scrape {url}")
+        job['result'] = {"status": "ERROR", "reason": "Failed to retrieve content", "languages": ["English"]}
+        return None
+    return job
+
+async def analyze_stage(job, gate, boilerplate, rules, local_model, reducer, analyze):
+    """
+    Analyze stage: strips boilerplate, runs Gemini on the crawled text and attaches seed metadata.
+    If the normalized text matches the last analyzed fingerprint, the previous verdict is reused;
+    otherwise a confident rule or local-model verdict is used before falling back to Gemini.
+    """
+    url = job['url']
+    target = job['target']
+    clinic_key = target['id'] or url
+    text = boilerplate.strip(job.pop('text'), url, clinic_key)
+    fp = fingerprint(text)
+
+    result = gate.lookup(clinic_key, fp)
+    if result is not None:
+        print(f"  ♻️  Unchanged since last analysis, reusing verdict ({url})")
+    else:
+        rule_verdict = rules.classify(text)
+        model_verdict = local_model.predict(text)
+        if rules.is_confident(rule_verdict):
+            result = rules.to_result(rule_verdict, text, gate.previous(clinic_key), target.get('name'))
+            print(f"  📏 Rule verdict {rule_verdict['status']} ({rule_verdict['confidence']:.2f}), skipping Gemini ({url})")
+        elif local_model.is_confident(model_verdict):
+            result = rules.to_result(model_verdict, text, gate.previous(clinic_key), target.get('name'))
+            result['source'] = 'local_model'
+            result['reason'] = f"Local model (confidence {model_verdict['confidence']:.2f})"
+            print(f"  🤖 Local model verdict {model_verdict['status']} ({model_verdict['confidence']:.2f}), skipping Gemini ({url})")
+        else:
+            reduced = reducer.reduce(text)
+            print(f"  🧠 Analyzing {url}... (~{estimate_tokens(text)} → ~{estimate_tokens(reduced)} tokens)")
+            result = await analyze(clinic_key, reduced)
+            rules.record_agreement(clinic_key, rule_verdict, result)
+            local_model.record_agreement(model_verdict, result)
+        gate.remember(clinic_key, fp, result)
+    result['fingerprint'] = fp
+
+    # Add ID and location from seed to result
+    result['id'] = target['id']
+    if target.get('city'):
+        result['district'] = target['city']
+    if target.get('province'):
+        result['province'] = target['province']
+
+    job['result'] = result
+    print(f"  ✅ Status: {result.get('status', 'UNKNOWN')} ({url})")
+    return job
+
+async def persist_stage(job, on_complete=None, snapshot=None, writer=None):
+    """
+    Persist stage: writes to Firestore and forwards the job to alerting only on a flip to OPEN.
+    Jobs that stop here are handed to `on_complete` (run journal and result outputs).
+    """
+    url = job['url']
+    result = job['result']
+
+    # Update Firestore and get old status
+    old_status = await update_clinic_in_firestore(url, result, snapshot=snapshot, writer=writer)
+
+    # Detect status flip: CLOSED/WAITLIST/UNCERTAIN → OPEN
+    new_status = result.get('status', 'UNKNOWN')
+
+    # Condition 1: New clinic (old_status is None) AND new_status is OPEN
+    # Condition 2: Status flip (old_status was not OPEN) AND new_status is OPEN
+    if new_status == "OPEN" and (old_status is None or old_status != "OPEN"):
+        print(f"  🔔 Status flip detected: {old_status} → {new_status}")
+        job['old_status'] = old_status
+        return job
+    if on_complete:
+        on_complete(job)
+    return None
+
+async def alert_stage(job, on_complete=None, subscriptions=None):
+    """Alert stage: sends SMS to matching premium users, then hands the job to `on_complete`."""
+    result = job['result']
+    clinic_name = result.get('clinic_name', 'Unknown Clinic')
+    clinic_city = result.get('district', 'Unknown')
+    clinic_languages = result.get('languages', ['English'])
+    await send_alert_batch(clinic_name, job['url'], clinic_city, clinic_languages, job['old_status'], subscriptions)
+    if on_complete:
+        on_complete(job)
+    return None
+
+def parse_args(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Clinic Scout scraper")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="Max clinics in flight at once (env CRAWL_CONCURRENCY, default 8)")
+    parser.add_argument("--per-host", type=int, default=None,
+                        help="Max clinics in flight per host (env CRAWL_PER_HOST, default 2)")
+    parser.add_argument("--analyze-workers", type=int,
+                        default=int(os.environ.get("ANALYZE_WORKERS", "4")),
+                        help="Concurrent Gemini analyses (env ANALYZE_WORKERS)")
+    parser.add_argument("--persist-workers", type=int,
+                        default=int(os.environ.get("PERSIST_WORKERS", "4")),
+                        help="Concurrent Firestore writers (env PERSIST_WORKERS)")
+    parser.add_argument("--alert-workers", type=int,
+                        default=int(os.environ.get("ALERT_WORKERS", "2")),
+                        help="Concurrent alert senders (env ALERT_WORKERS)")
+    parser.add_argument("--queue-size", type=int,
+                        default=int(os.environ.get("PIPELINE_QUEUE_SIZE", "8")),
+                        help="Max jobs waiting between stages; bounds crawled text held in memory (env PIPELINE_QUEUE_SIZE)")
+    parser.add_argument("--batch-size", type=int,
+                        default=int(os.environ.get("ANALYSIS_BATCH_SIZE", "1")),
+                        help="Clinics per Gemini request; 1 disables batching (env ANALYSIS_BATCH_SIZE)")
+    parser.add_argument("--resume", metavar="RUN_ID", default=None,
+                        help="Resume an interrupted run: skip clinics already in its journal")
+    parser.add_argument("--output", action="append", metavar="FORMAT[:PATH]", default=None,
+                        help="Stream results to csv, jsonl or parquet; repeatable, PATH may use {timestamp} "
+                             "(env RESULTS_OUTPUTS, default csv on the Desktop)")
+    return parser.parse_args(argv)
+
+async def main(args=None):
+    if args is None:
+        args = parse_args([])
+
     # Read target URLs from CSV
     targets = []
     seed_file = os.environ.get("SEED_FILE", "clinic_seed.csv")
@@ -411,6 +708,7 @@ async def main():
                     targets.append({
                         'url': row['url'].strip(),
                         'id': row.get('id', '').strip(),
+                        'name': row.get('name', '').strip(),
                         'city': row.get('city', '').strip(),
                         'province': row.get('province', '').strip()
                     })
@@ -419,91 +717,166 @@ async def main():
         print(f"❌ Error: {seed_file} not found.")
         return
 
-    results = {}
+    try:
+        journal = RunJournal(args.resume)
+    except FileNotFoundError as e:
+        print(f"❌ Error: {e}")
+        return
+    print(f"📓 Run journal: {journal.run_id} (resume with --resume {journal.run_id})")
 
-    for target in targets:
-        url = target['url']
-        clinic_id = target['id']
-        
-        print(f"\n🕷️  Crawling: {url}")
-        # Use deep research crawling
-        text_content = await crawl_clinic(url)
-        
-        if text_content:
-            print(f"  🧠 Analyzing...")
-            result = await analyze_clinic_status(text_content)
-            
-            # Add ID and location from seed to result
-            result['id'] = clinic_id
-            if target.get('city'):
-                result['district'] = target['city']
-            if target.get('province'):
-                result['province'] = target['province']
-            
-            results[url] = result
-            status = result.get('status', 'UNKNOWN')
-            print(f"  ✅ Status: {status}")
-            
-            # Update Firestore and get old status
-            old_status = await update_clinic_in_firestore(url, result)
-            
-            # Detect status flip: CLOSED/WAITLIST/UNCERTAIN → OPEN
-            new_status = result.get('status', 'UNKNOWN')
-            
-            # Condition 1: New clinic (old_status is None) AND new_status is OPEN
-            # Condition 2: Status flip (old_status was not OPEN) AND new_status is OPEN
-            if new_status == "OPEN" and (old_status is None or old_status != "OPEN"):
-                clinic_name = result.get('clinic_name', 'Unknown Clinic')
-                clinic_city = result.get('district', 'Unknown')
-                clinic_languages = result.get('languages', ['English'])
-                
-                print(f"  🔔 Status flip detected: {old_status} → {new_status}")
-                await send_alert_batch(clinic_name, url, clinic_city, clinic_languages, old_status)
-                
-        else:
-            results[url] = {"status": "ERROR", "reason": "Failed to retrieve content", "languages": ["English"]}
-            print(f"  ❌ Failed to scrape")
+    # Verdicts are streamed to the outputs in seed order as clinics complete; a resumed run replays its journal first
+    sinks = ResultSinks(args.output, timestamp=datetime.now().strftime("%Y-%m-%d_%H-%M-%S"),
+                        seed_rows=len(targets))
+    completed = set()
+    if journal.resumed:
+        # A URL listed on several seed rows is crawled once per row but journaled once: fill every row
+        seed_positions = {}
+        for position, target in enumerate(targets):
+            seed_positions.setdefault(target['url'], []).append(position)
+        for url, result in journal.entries():
+            if url not in completed and (result or {}).get('status') != 'ERROR':
+                completed.add(url)
+                for position in seed_positions.get(url, [None]):
+                    sinks.write(url, result, position)
+        print(f"⏭️  Resuming: {len(completed)} clinic(s) already done, {len(targets) - len(completed)} to go")
 
-    print("\n" + "="*60)
-    print("📊 SCRAPING COMPLETE")
-    print("="*60)
+    def complete(job):
+        # Failed crawls and analyses are reported but not journaled, so a resume retries them
+        if job['result'].get('status') != 'ERROR':
+            journal.record(job)
+        sinks.write(job['url'], job.pop('result'), job['position'])
+        job['done'] = True
+
+    # One field-masked scan of `clinics` replaces a doc read per clinic for old-status lookups
+    snapshot = ClinicSnapshot(store) if store else None
+    if snapshot:
+        try:
+            await snapshot.load()
+        except Exception as e:
+            # An empty map would make every OPEN clinic look like a flip, so fall back to doc reads
+            print(f"⚠️ Clinic snapshot failed ({e}), falling back to per-clinic reads")
+            snapshot = None
+    # Clinic writes are coalesced and committed in batches in the background
+    writer = FirestoreWriter(store).start() if store else None
+    # Built from the premium users on the first flip, then shared by every alert
+    subscriptions = SubscriptionIndex(store) if store else None
+
+    gate = FingerprintGate()
+    # Firestore doc id → fingerprint-gate key, to invalidate clinics whose write was dropped
+    clinic_keys = {clinic_doc_id(t['url'], {'id': t['id']}): t['id'] or t['url'] for t in targets}
+    llm_cache = LLMCache()
+    reducer = TextReducer()
+    boilerplate = BoilerplateFilter()
+
+    batcher = None
+    if args.batch_size > 1:
+        batcher = BatchAnalyzer(
+            lambda items: analyze_clinic_batch(items, llm_cache),
+            lambda text: analyze_clinic_status(text, llm_cache),
+            max_clinics=args.batch_size,
+        )
+        # Each analyze worker waits on its clinic's batch, so batches can't outgrow the worker count
+        args.analyze_workers = max(args.analyze_workers, args.batch_size * 2)
+
+    async def analyze_full(clinic_key, text):
+        if batcher:
+            return await batcher.analyze(clinic_key, text)
+        return await analyze_clinic_status(text, llm_cache)
+
+    delta = DeltaAnalyzer(
+        analyze_full,
+        lambda previous, removed, added: analyze_clinic_delta(previous, removed, added, llm_cache),
+    )
+    analyze = delta.analyze
+    rules = RuleEngine()
+    local_model = LocalModelGate()
+    scheduler = CrawlScheduler(concurrency=args.concurrency, per_host=args.per_host)
+
+    # crawl (scheduler) → analyze → persist → alert, joined by bounded queues.
+    # A crawler blocks on a full analyze queue, so page text can't pile up.
+    pipeline = Pipeline([
+        Stage("analyze", lambda job: analyze_stage(job, gate, boilerplate, rules, local_model, reducer, analyze), workers=args.analyze_workers, queue_size=args.queue_size),
+        Stage("persist", lambda job: persist_stage(job, complete, snapshot, writer), workers=args.persist_workers, queue_size=args.queue_size),
+        Stage("alert", lambda job: alert_stage(job, complete, subscriptions), workers=args.alert_workers, queue_size=args.queue_size),
+    ]).start()
 
-    # Save to CSV on Desktop
-    import csv
-    from datetime import datetime
+    jobs = [{'url': target['url'], 'target': target, 'position': position}
+            for position, target in enumerate(targets) if target['url'] not in completed]
 
-    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    desktop_path = os.path.expanduser("~/Desktop")
-    filename = f"clinic_scout_{timestamp}.csv"
-    file_path = os.path.join(desktop_path, filename)
+    async def crawl_and_submit(job):
+        if await crawl_stage(job, pool, fetcher):
+            await pipeline.submit(job)
+        else:
+            complete(job)
 
+    blocker = ResourceBlocker()
+    pool = BrowserPool(blocker=blocker)
+    fetcher = StaticFetcher()
+    await pool.start()
+    await fetcher.start()
     try:
-        with open(file_path, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['Clinic Name', 'Address', 'District', 'Phone', 'Vacancy', 'Languages', 'Status', 'Reason', 'Evidence', 'URL']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-
-            writer.writeheader()
-            for url, data in results.items():
-                # Format languages array as comma-separated string for CSV
-                langs = data.get('languages', ['English'])
-                if isinstance(langs, list):
-                    langs = ", ".join(langs)
-                
-                writer.writerow({
-                    'Clinic Name': data.get('clinic_name', 'N/A'),
-                    'Address': data.get('address', 'N/A'),
-                    'District': data.get('district', 'N/A'),
-                    'Phone': data.get('phone_number', 'N/A'),
-                    'Vacancy': data.get('remaining_vacancy', 'N/A'),
-                    'Languages': langs,
-                    'Status': data.get('status', 'UNKNOWN'),
-                    'Reason': data.get('reason', 'No reason provided'),
-                    'Evidence': data.get('evidence', 'N/A'),
-                    'URL': url
-                })
-        print(f"\n💾 Results saved to: {file_path}")
-    except Exception as e:
-        print(f"\n❌ Error saving to CSV: {e}")
+        await scheduler.run(jobs, crawl_and_submit)
+    finally:
+        await fetcher.close()
+        await pool.close()
+        await pipeline.drain()
+        # Flush-on-shutdown: queued clinic writes are committed even if the crawl failed
+        if writer:
+            # Run heartbeat for the site's "Last checked" (clinic docs only change with their verdicts)
+            writer.set('clinicChecks', 'latest', {"lastChecked": datetime.now(ZoneInfo("America/Toronto")),
+                                                  "clinics": len(jobs)})
+            await writer.close()
+            # A clinic whose write was dropped must not look analyzed and persisted next run
+            lost = {clinic_keys[doc_id] for collection, doc_id in writer.failed_docs
+                    if collection == 'clinics' and doc_id in clinic_keys}
+            for clinic_key in lost:
+                gate.invalidate(clinic_key)
+            if lost:
+                print(f"⚠️ {len(lost)} clinic write(s) dropped after retries; they will be re-analyzed and rewritten next run")
+        if store:
+            await store.close()
+    gate.close()
+    llm_cache.close()
+    delta.close()
+    boilerplate.close()
+    rules.close()
+    model_router.close()
+
+    # Jobs lost to a stage error are reported but left out of the journal, so a resume retries them
+    for job in jobs:
+        if not job.get('done'):
+            sinks.write(job['url'], {"status": "ERROR", "reason": "Pipeline failed", "languages": ["English"]},
+                        job['position'])
+    journal.close()
+    sinks.close()
+
+    print("\n" + "="*60)
+    print("📊 SCRAPING COMPLETE")
+    print("="*60)
+    scheduler.print_stats()
+    pipeline.print_stats()
+    if snapshot:
+        snapshot.print_stats()
+    if writer:
+        writer.print_stats()
+    if subscriptions and subscriptions.loaded:
+        subscriptions.print_stats()
+    gate.print_stats()
+    boilerplate.print_stats()
+    rules.print_stats()
+    local_model.print_stats()
+    reducer.print_stats()
+    delta.print_stats()
+    llm_cache.print_stats()
+    llm_client.print_stats()
+    model_router.print_stats()
+    verdict_validator.print_stats()
+    if batcher:
+        batcher.print_stats()
+    fetcher.print_stats()
+    pool.print_stats()
+    blocker.print_stats()
+    sinks.print_stats()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,138 @@
+import json
+import os
+from collections import Counter, defaultdict
+
+from cache_store import cache_path
+from llm_client import LatencyTracker
+from rules import classify
+from text_reduction import estimate_tokens
+
+DEFAULT_ROUTING_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "model_routing.json")
+
+
+class ModelRouter:
+    """
+    Picks which Gemini model analyzes a clinic, cheapest tier first.
+
+    The routing table (MODEL_ROUTING_FILE, default model_routing.json) lists tiers
+    from cheapest to strongest. A tier's optional "when" limits it to texts of at
+    most "max_tokens" whose rule signal (rules.classify) reaches
+    "min_signal_confidence"; the last tier takes everything else. A verdict from a
+    lower tier is escalated to the next one when its status is in
+    "escalate_on_status", when it contradicts a rule signal of at least
+    "conflict_confidence", or when it could not be parsed.
+
+    Every decision is appended to routing_decisions.jsonl; per-model latency and
+    estimated cost (from the tiers' USD-per-million-token prices) go in the run stats.
+    """
+
+    def __init__(self, path=None, default_model=None):
+        path = path or os.environ.get("MODEL_ROUTING_FILE", DEFAULT_ROUTING_FILE)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                table = json.load(f)
+        else:
+            table = {"tiers": [{"name": "default", "model": default_model}]}
+        self.tiers = table["tiers"]
+        self.escalate_on_status = set(table.get("escalate_on_status", ["UNCERTAIN"]))
+        self.conflict_confidence = table.get("conflict_confidence", 0.6)
+        self.prices = {tier["model"]: tier for tier in self.tiers}
+
+        self.log_path = cache_path("routing_decisions.jsonl")
+        self._log = open(self.log_path, 'a', encoding='utf-8')
+        self.routed = Counter()
+        self.escalations = Counter()
+        self.latency = defaultdict(LatencyTracker)
+        self.calls = Counter()
+        self.cost = Counter()
+
+    @property
+    def strongest(self):
+        return self.tiers[-1]["model"]
+
+    def route(self, text):
+        """Returns the decision for `text`: {'tier', 'model', 'reason', 'signal', 'tokens', 'escalations'}."""
+        tokens = estimate_tokens(text)
+        signal = classify(text)
+        reason = "fallback"
+        index = len(self.tiers) - 1
+        for i, tier in enumerate(self.tiers[:-1]):
+            when = tier.get("when", {})
+            if tokens > when.get("max_tokens", float("inf")):
+                reason = "long text"
+                continue
+            if signal["confidence"] < when.get("min_signal_confidence", 0.0):
+                reason = "ambiguous text"
+                continue
+            index, reason = i, "short and clear"
+            break
+        self.routed[self.tiers[index].get("name", self.tiers[index]["model"])] += 1
+        return {"tier": index, "model": self.tiers[index]["model"], "reason": reason,
+                "signal": signal, "tokens": tokens, "escalations": []}
+
+    def escalate(self, decision, verdict=None, error=None):
+        """Moves `decision` to the next tier if the verdict calls for it; returns False when it stays."""
+        if decision["tier"] >= len(self.tiers) - 1:
+            return False
+        signal = decision["signal"]
+        if error is not None:
+            reason = "unparseable"
+        elif verdict.get("status") in self.escalate_on_status:
+            reason = f"status {verdict.get('status')}"
+        elif (signal["status"] and signal["confidence"] >= self.conflict_confidence
+              and verdict.get("status") != signal["status"]):
+            reason = "conflicts with rules"
+        else:
+            return False
+        self.escalations[reason] += 1
+        decision["escalations"].append({"from": decision["model"], "reason": reason})
+        decision["tier"] += 1
+        decision["model"] = self.tiers[decision["tier"]]["model"]
+        return True
+
+    def finish(self, decision, result):
+        self._log.write(json.dumps({
+            "model": decision["model"],
+            "reason": decision["reason"],
+            "tokens": decision["tokens"],
+            "signal_status": decision["signal"]["status"],
+            "signal_confidence": decision["signal"]["confidence"],
+            "escalations": decision["escalations"],
+            "status": result.get("status"),
+        }) + "\n")
+        self._log.flush()
+
+    def record(self, model_name, seconds, prompt, response_text):
+        """Latency and estimated cost of one network call to `model_name`."""
+        self.calls[model_name] += 1
+        self.latency[model_name].add(seconds)
+        price = self.prices.get(model_name, {})
+        self.cost[model_name] += (estimate_tokens(prompt) * price.get("input_usd_per_million", 0.0)
+                                  + estimate_tokens(response_text) * price.get("output_usd_per_million", 0.0)) / 1e6
+
+    def close(self):
+        self._log.close()
+
+    def stats(self):
+        return {
+            "routed": dict(self.routed),
+            "escalations": dict(self.escalations),
+            "models": {
+                model: {
+                    "calls": self.calls[model],
+                    "latency_p50": self.latency[model].percentile(50),
+                    "latency_p95": self.latency[model].percentile(95),
+                    "cost_usd": round(self.cost[model], 4),
+                }
+                for model in self.calls
+            },
+        }
+
+    def print_stats(self):
+        s = self.stats()
+        routed = ", ".join(f"{tier} {n}" for tier, n in s['routed'].items()) or "none"
+        escalated = ", ".join(f"{reason} {n}" for reason, n in s['escalations'].items()) or "none"
+        print(f"🧭 Model routing: {routed} | escalations: {escalated} (log: {self.log_path})")
+        for model, m in s['models'].items():
+            print(f"   {model}: {m['calls']} call(s), p50 {m['latency_p50']:.2f}s, p95 {m['latency_p95']:.2f}s, "
+                  f"~${m['cost_usd']:.4f}")
@@ -0,0 +1,96 @@
+import asyncio
+import time
+
+
+class Stage:
+    """
+    A pool of workers draining one bounded queue.
+
+    `handler(item)` returns the item to hand to the next stage, or None when the
+    item stops here (failed, or nothing left to do).
+    """
+
+    def __init__(self, name, handler, workers=1, queue_size=16):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.processed = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.put_wait_seconds = 0.0
+        self.peak_queue = 0
+
+    async def put(self, item):
+        """Enqueues an item; blocks while the queue is full (backpressure on the producer)."""
+        started = time.monotonic()
+        await self.queue.put(item)
+        self.put_wait_seconds += time.monotonic() - started
+        self.peak_queue = max(self.peak_queue, self.queue.qsize())
+
+
+class Pipeline:
+    """
+    Chains stages with bounded queues so slow stages overlap instead of stalling each other.
+    Items submitted to the pipeline enter the first stage.
+    """
+
+    def __init__(self, stages):
+        self.stages = stages
+        self._tasks = []
+
+    def start(self):
+        for i, stage in enumerate(self.stages):
+            downstream = self.stages[i + 1] if i + 1 < len(self.stages) else None
+            for _ in range(stage.workers):
+                self._tasks.append(asyncio.create_task(self._worker(stage, downstream)))
+        return self
+
+    async def submit(self, item):
+        await self.stages[0].put(item)
+
+    async def _worker(self, stage, downstream):
+        while True:
+            item = await stage.queue.get()
+            started = time.monotonic()
+            try:
+                out = await stage.handler(item)
+            except Exception as e:
+                stage.errors += 1
+                out = None
+                print(f"  ❌ {stage.name} stage error: {e}")
+            finally:
+                stage.busy_seconds += time.monotonic() - started
+                stage.processed += 1
+            if out is not None and downstream is not None:
+                await downstream.put(out)
+            stage.queue.task_done()
+
+    async def drain(self):
+        """Waits until every stage is empty (stage by stage, since each feeds the next), then stops workers."""
+        for stage in self.stages:
+            await stage.queue.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self):
+        return {
+            stage.name: {
+                "workers": stage.workers,
+                "processed": stage.processed,
+                "errors": stage.errors,
+                "busy_seconds": round(stage.busy_seconds, 2),
+                "peak_queue": stage.peak_queue,
+                "backpressure_seconds": round(stage.put_wait_seconds, 2),
+            }
+            for stage in self.stages
+        }
+
+    def print_stats(self):
+        print("🧵 Pipeline stages:")
+        for name, s in self.stats().items():
+            print(f"   {name:<8} workers={s['workers']} processed={s['processed']} errors={s['errors']} "
+                  f"busy={s['busy_seconds']}s peak queue={s['peak_queue']} "
+                  f"backpressure={s['backpressure_seconds']}s")
@@ -0,0 +1,81 @@
+import os
+from collections import Counter
+from urllib.parse import urlparse
+
+from scheduler import host_key
+
+# innerText only needs the DOM (and CSS, which decides what is visible), so these are dead weight
+BLOCKED_RESOURCE_TYPES = {'image', 'media', 'font', 'texttrack', 'eventsource', 'websocket', 'manifest'}
+
+# Third-party analytics, ad and chat widget hosts (matched on the host suffix)
+TRACKER_HOSTS = (
+    'google-analytics.com', 'googletagmanager.com', 'doubleclick.net', 'googlesyndication.com',
+    'googleadservices.com', 'facebook.net', 'facebook.com', 'connect.facebook.net', 'hotjar.com',
+    'clarity.ms', 'bing.com', 'linkedin.com', 'licdn.com', 'twitter.com', 'tiktok.com',
+    'intercom.io', 'intercomcdn.com', 'tawk.to', 'zdassets.com', 'zopim.com', 'hs-scripts.com',
+    'hs-analytics.net', 'hubspot.com', 'livechatinc.com', 'crisp.chat', 'drift.com',
+    'youtube.com', 'ytimg.com', 'vimeo.com', 'cookielaw.org', 'onetrust.com', 'newrelic.com',
+    'nr-data.net', 'segment.io', 'mixpanel.com', 'fullstory.com', 'recaptcha.net',
+)
+
+# Rough average transfer size per blocked request, used to estimate bandwidth saved
+_ESTIMATED_BYTES = {'image': 60_000, 'media': 500_000, 'font': 35_000, 'script': 45_000}
+_DEFAULT_ESTIMATE = 10_000
+
+
+def _is_tracker(host):
+    return any(host == t or host.endswith('.' + t) for t in TRACKER_HOSTS)
+
+
+class ResourceBlocker:
+    """
+    Playwright route policy that aborts non-essential resource types and known
+    tracker hosts. Hosts listed in BLOCK_RESOURCES_ALLOWLIST (comma-separated)
+    load everything; BLOCK_RESOURCES=false turns blocking off entirely.
+    """
+
+    def __init__(self, allowlist=None):
+        self.enabled = os.environ.get("BLOCK_RESOURCES", "true").lower() == "true"
+        if allowlist is None:
+            allowlist = [h for h in os.environ.get("BLOCK_RESOURCES_ALLOWLIST", "").split(',') if h.strip()]
+        self.allowlist = {host_key('//' + h.strip()) for h in allowlist}
+        self.blocked_by_type = Counter()
+        self.blocked_trackers = 0
+        self.allowed = 0
+
+    def applies_to(self, site_url):
+        return self.enabled and bool(site_url) and host_key(site_url) not in self.allowlist
+
+    async def install(self, context):
+        await context.route("**/*", self._handle)
+
+    async def _handle(self, route):
+        request = route.request
+        resource_type = request.resource_type
+        if resource_type in BLOCKED_RESOURCE_TYPES:
+            self.blocked_by_type[resource_type] += 1
+            await route.abort()
+        elif _is_tracker(urlparse(request.url).hostname or ''):
+            self.blocked_trackers += 1
+            self.blocked_by_type[resource_type] += 1
+            await route.abort()
+        else:
+            self.allowed += 1
+            await route.continue_()
+
+    def stats(self):
+        blocked = sum(self.blocked_by_type.values())
+        estimated_bytes = sum(_ESTIMATED_BYTES.get(t, _DEFAULT_ESTIMATE) * n for t, n in self.blocked_by_type.items())
+        return {
+            "blocked": blocked,
+            "blocked_trackers": self.blocked_trackers,
+            "allowed": self.allowed,
+            "blocked_by_type": dict(self.blocked_by_type),
+            "estimated_bytes_saved": estimated_bytes,
+        }
+
+    def print_stats(self):
+        s = self.stats()
+        by_type = ", ".join(f"{t}={n}" for t, n in sorted(s['blocked_by_type'].items())) or "none"
+        print(f"🚫 Blocked {s['blocked']} request(s) ({s['blocked_trackers']} tracker), "
+              f"allowed {s['allowed']} | ~{s['estimated_bytes_saved'] / 1e6:.1f} MB saved (est.) | {by_type}")
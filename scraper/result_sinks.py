@@ -0,0 +1,236 @@
+import csv
+import json
+import os
+import time
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+DEFAULT_PATHS = {
+    "csv": "~/Desktop/clinic_scout_{timestamp}.csv",
+    "jsonl": "~/Desktop/clinic_scout_{timestamp}.jsonl",
+    "parquet": "~/Desktop/clinic_scout_{timestamp}.parquet",
+}
+
+CSV_FIELDS = ['Clinic Name', 'Address', 'District', 'Phone', 'Vacancy', 'Languages', 'Status', 'Reason', 'Evidence', 'URL']
+
+# Flat, typed columns for analytics; `languages` stays a list
+PARQUET_FIELDS = ['url', 'id', 'clinic_name', 'address', 'district', 'province', 'phone_number',
+                  'remaining_vacancy', 'languages', 'status', 'reason', 'evidence', 'source', 'checked_at']
+
+
+def csv_row(url, data):
+    """One row of the Desktop CSV report."""
+    # Format languages array as comma-separated string for CSV
+    langs = data.get('languages', ['English'])
+    if isinstance(langs, list):
+        langs = ", ".join(langs)
+    return {
+        'Clinic Name': data.get('clinic_name', 'N/A'),
+        'Address': data.get('address', 'N/A'),
+        'District': data.get('district', 'N/A'),
+        'Phone': data.get('phone_number', 'N/A'),
+        'Vacancy': data.get('remaining_vacancy', 'N/A'),
+        'Languages': langs,
+        'Status': data.get('status', 'UNKNOWN'),
+        'Reason': data.get('reason', 'No reason provided'),
+        'Evidence': data.get('evidence', 'N/A'),
+        'URL': url
+    }
+
+
+class RotatingSink:
+    """
+    Base for a streaming output file that starts a new part every `rotate_rows` rows
+    (0 never rotates). Parts are named <stem>_part0001<ext>, <stem>_part0002<ext>, ...
+    """
+
+    def __init__(self, path, rotate_rows=0):
+        self.path = path
+        self.rotate_rows = rotate_rows
+        self.part = 0
+        self.rows_in_part = 0
+        self.rows = 0
+        self.files = []
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def _part_path(self):
+        if not self.rotate_rows:
+            return self.path
+        stem, ext = os.path.splitext(self.path)
+        return f"{stem}_part{self.part:04d}{ext}"
+
+    def write(self, url, result):
+        if self.rows_in_part == 0:
+            self.part += 1
+            self.files.append(self._part_path())
+            self._open(self.files[-1])
+        self._write(url, result)
+        self.rows += 1
+        self.rows_in_part += 1
+        if self.rotate_rows and self.rows_in_part >= self.rotate_rows:
+            self._close()
+            self.rows_in_part = 0
+
+    def close(self):
+        if self.rows_in_part:
+            self._close()
+            self.rows_in_part = 0
+
+
+class CSVSink(RotatingSink):
+    """The Desktop CSV report, one flushed row per clinic."""
+
+    def _open(self, path):
+        self._file = open(path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=CSV_FIELDS)
+        self._writer.writeheader()
+
+    def _write(self, url, result):
+        self._writer.writerow(csv_row(url, result))
+        self._file.flush()
+
+    def _close(self):
+        os.fsync(self._file.fileno())
+        self._file.close()
+
+
+class JSONLSink(RotatingSink):
+    """Full verdicts, one flushed JSON object per line."""
+
+    def _open(self, path):
+        self._file = open(path, 'w', encoding='utf-8')
+
+    def _write(self, url, result):
+        self._file.write(json.dumps({"url": url, **result}, default=str, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def _close(self):
+        os.fsync(self._file.fileno())
+        self._file.close()
+
+
+class ParquetSink(RotatingSink):
+    """
+    Columnar verdicts, written in row groups of `row_group_size`. A Parquet file is
+    only readable once its footer is written, so each part is built as
+    <part>.inprogress and renamed into place when it is closed.
+    """
+
+    def __init__(self, path, rotate_rows=0, row_group_size=None):
+        if pa is None:
+            raise RuntimeError("pyarrow is not installed")
+        super().__init__(path, rotate_rows)
+        self.row_group_size = row_group_size or int(os.environ.get("RESULTS_PARQUET_ROW_GROUP", "500"))
+        self.schema = pa.schema([
+            (name, pa.list_(pa.string()) if name == 'languages' else
+             pa.float64() if name == 'checked_at' else pa.string())
+            for name in PARQUET_FIELDS
+        ])
+        self._buffer = []
+
+    def _open(self, path):
+        self._final_path = path
+        self._writer = pq.ParquetWriter(path + ".inprogress", self.schema)
+
+    def _write(self, url, result):
+        row = {"url": url, "checked_at": time.time()}
+        for name in PARQUET_FIELDS[1:-1]:
+            value = result.get(name)
+            if name == 'languages':
+                row[name] = [str(l) for l in value] if isinstance(value, list) else None
+            else:
+                row[name] = None if value is None else str(value)
+        self._buffer.append(row)
+        if len(self._buffer) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if self._buffer:
+            self._writer.write_table(pa.Table.from_pylist(self._buffer, schema=self.schema))
+            self._buffer = []
+
+    def _close(self):
+        self._flush()
+        self._writer.close()
+        os.replace(self._final_path + ".inprogress", self._final_path)
+
+
+SINKS = {"csv": CSVSink, "jsonl": JSONLSink, "parquet": ParquetSink}
+
+
+class ResultSinks:
+    """
+    Streams every verdict to the configured outputs as soon as it is produced.
+
+    `specs` are "format" or "format:path" strings (RESULTS_OUTPUTS, comma-separated,
+    default "csv"); paths may contain {timestamp}. Outputs rotate to a new part
+    every RESULTS_ROTATE_ROWS rows (0 = one file). An output that fails is
+    reported and dropped without affecting the others.
+
+    With `seed_rows` (the number of seed rows) and a seed row `position` on each
+    write, rows come out in seed order whatever order clinics complete in: a small
+    reorder buffer holds each verdict until every earlier seed row has been
+    written, and `close()` flushes what is left. Positions rather than URLs key
+    the buffer because a seed file can list the same URL more than once.
+    """
+
+    def __init__(self, specs=None, timestamp=None, rotate_rows=None, seed_rows=0):
+        if specs is None:
+            specs = [s.strip() for s in os.environ.get("RESULTS_OUTPUTS", "csv").split(",") if s.strip()]
+        rotate_rows = rotate_rows if rotate_rows is not None else int(os.environ.get("RESULTS_ROTATE_ROWS", "0"))
+        self.sinks = []
+        self.seed_rows = seed_rows
+        self._next = 0
+        self._held = {}  # seed position -> (url, result) waiting for an earlier clinic
+        self.max_held = 0
+        for spec in specs:
+            fmt, _, path = spec.partition(":")
+            fmt = fmt.lower()
+            if fmt not in SINKS:
+                print(f"⚠️ Unknown output format '{fmt}', skipping")
+                continue
+            path = os.path.expanduser((path or DEFAULT_PATHS[fmt]).format(timestamp=timestamp or ""))
+            try:
+                self.sinks.append((fmt, SINKS[fmt](path, rotate_rows)))
+            except Exception as e:
+                print(f"❌ Error opening {fmt} output {path}: {e}")
+
+    def write(self, url, result, position=None):
+        if position is None or not 0 <= position < self.seed_rows or position < self._next or position in self._held:
+            self._emit(url, result)  # Not a seed row (or a repeat): nothing to wait for
+            return
+        self._held[position] = (url, result)
+        self.max_held = max(self.max_held, len(self._held))
+        while self._next in self._held:
+            self._emit(*self._held.pop(self._next))
+            self._next += 1
+
+    def _emit(self, url, result):
+        for fmt, sink in list(self.sinks):
+            try:
+                sink.write(url, result)
+            except Exception as e:
+                print(f"❌ Error writing {fmt} output: {e}")
+                self.sinks.remove((fmt, sink))
+
+    def close(self):
+        # Clinics that never completed leave gaps; the rest still come out in seed order
+        for position in sorted(self._held):
+            self._emit(*self._held.pop(position))
+        for fmt, sink in self.sinks:
+            try:
+                sink.close()
+            except Exception as e:
+                print(f"❌ Error closing {fmt} output: {e}")
+
+    def print_stats(self):
+        for fmt, sink in self.sinks:
+            for path in sink.files:
+                print(f"💾 Results saved to: {path}")
+        if self.seed_rows:
+            print(f"   Rows in seed order (reorder buffer peaked at {self.max_held} row(s))")
@@ -0,0 +1,189 @@
+import json
+import os
+import random
+import re
+from collections import Counter
+
+from cache_store import cache_path
+
+# (status, weight, pattern). Weights are evidence strength: a single explicit
+# sentence is enough to clear the default threshold, vaguer phrases are not.
+# A bare "accepting new patients" is too often part of a question or a
+# conditional to decide on its own, so it stays below the threshold.
+_RULES = [
+    # English
+    ("CLOSED", 1.0, r"(?:not|no longer|isn't|aren't|is not|are not)\s+(?:currently\s+|presently\s+)?(?:accepting|taking(?: on)?|registering)\s+(?:any\s+)?new\s+(?:patients|clients)"),
+    ("CLOSED", 0.9, r"(?:unable|not able) to (?:accept|take(?: on)?|register) (?:any )?new (?:patients|clients)"),
+    ("CLOSED", 0.8, r"(?:practice|roster|physicians?|doctors?) (?:is|are) (?:currently )?(?:full|at (?:full )?capacity)"),
+    ("CLOSED", 0.6, r"closed to new patients|no new patients"),
+    ("WAITLIST", 0.9, r"(?:join|added to|put on|placed on|sign up for) (?:our|the|a) (?:wait\s?-?list|waiting list)"),
+    ("WAITLIST", 0.6, r"wait\s?-?list|waiting list"),
+    ("OPEN", 1.0, r"(?:now|currently) (?:accepting|taking(?: on)?|registering) new (?:patients|clients)"),
+    ("OPEN", 0.8, r"(?:accepting|taking(?: on)?) new (?:patients|clients)"),
+    ("OPEN", 0.7, r"new patients (?:are )?welcome|welcom(?:e|ing) new patients"),
+    ("OPEN", 0.4, r"register (?:now|today|online)"),
+    # French
+    ("CLOSED", 1.0, r"(?:n'accept(?:e|ons|ent)|ne pren(?:d|ons|nent)) (?:plus |pas |actuellement pas )+(?:de )?nouveaux (?:patients|clients)"),
+    ("WAITLIST", 0.9, r"(?:inscri(?:re|vez)[- ]vous|ajout(?:é|er)) (?:sur|à) (?:la|notre) liste d'attente"),
+    ("WAITLIST", 0.6, r"liste d'attente"),
+    ("OPEN", 1.0, r"(?:accept(?:e|ons|ent)|pren(?:d|ons|nent)) (?:maintenant |actuellement )?(?:de )?nouveaux (?:patients|clients)"),
+    ("OPEN", 0.7, r"nouveaux patients bienvenus"),
+]
+_COMPILED = [(status, weight, re.compile(pattern, re.IGNORECASE)) for status, weight, pattern in _RULES]
+
+# A negation shortly before an OPEN phrase, in the same clause, turns it into CLOSED
+# ("we are sorry, but we are not ... accepting"); "if you do not have a doctor, we are accepting" stays OPEN
+_NEGATION = re.compile(r"\b(?:not|no longer|never|unable|cannot|ne|pas)\b|n't|n'", re.IGNORECASE)
+_NEGATION_WINDOW = 40
+_CLAUSE_BREAK = re.compile(r"[,;:?]")
+
+_SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+|\n+')
+
+LANGUAGES = ['English', 'French', 'Mandarin', 'Cantonese', 'Spanish', 'Arabic', 'Punjabi', 'Urdu', 'Hindi',
+             'Tamil', 'Portuguese', 'Italian', 'Farsi', 'Korean', 'Russian', 'Tagalog', 'Vietnamese',
+             'Polish', 'Gujarati', 'Greek', 'Bengali', 'Somali', 'Ukrainian']
+_LANGUAGE_PATTERN = re.compile(r'\b(' + '|'.join(LANGUAGES) + r')\b', re.IGNORECASE)
+
+
+def _negation_window(sentence, start):
+    """The up to _NEGATION_WINDOW characters before `start`, cut at the last clause break."""
+    window = sentence[max(0, start - _NEGATION_WINDOW):start]
+    breaks = list(_CLAUSE_BREAK.finditer(window))
+    return window[breaks[-1].end():] if breaks else window
+
+
+def classify(text):
+    """
+    Returns {'status', 'confidence', 'evidence'} from explicit status phrases, or
+    status None when nothing matched. Confidence is the winning status' strongest
+    evidence weight, discounted by how much contradicting evidence was found.
+    """
+    best = {}  # status -> (weight, sentence)
+    totals = Counter()
+    for sentence in _SENTENCE_SPLIT.split(text):
+        if sentence.rstrip().endswith("?"):
+            continue  # FAQ questions ("Are you accepting new patients?") say nothing either way
+        if len(sentence) > 600:
+            sentence = sentence[:600]
+        for status, weight, pattern in _COMPILED:
+            match = pattern.search(sentence)
+            if not match:
+                continue
+            if status == "OPEN" and _NEGATION.search(_negation_window(sentence, match.start())):
+                status = "CLOSED"
+            totals[status] += weight
+            if weight > best.get(status, (0, ""))[0]:
+                best[status] = (weight, sentence.strip())
+
+    if not totals:
+        return {"status": None, "confidence": 0.0, "evidence": None}
+
+    # Waitlist mentions usually accompany CLOSED ("not accepting, but join our waitlist")
+    if "WAITLIST" in totals and "CLOSED" in totals and best["WAITLIST"][0] >= 0.9:
+        winner = "WAITLIST"
+    else:
+        winner = max(totals, key=lambda s: (best[s][0], totals[s]))
+    conflict = sum(v for s, v in totals.items() if s != winner and not (winner == "WAITLIST" and s == "CLOSED"))
+    confidence = best[winner][0] * totals[winner] / (totals[winner] + conflict)
+    return {"status": winner, "confidence": round(confidence, 3), "evidence": best[winner][1]}
+
+
+def detect_languages(text):
+    found = {m.group(1).capitalize() for m in _LANGUAGE_PATTERN.finditer(text)}
+    return [lang for lang in LANGUAGES if lang in found] or ['English']
+
+
+class RuleEngine:
+    """
+    Local rule cascade in front of Gemini.
+
+    Verdicts at or above RULES_CONFIDENCE_THRESHOLD skip the LLM. A fraction
+    RULES_SHADOW_RATE of those still goes to the LLM so agreement keeps being
+    measured; every rule/LLM comparison is appended to rule_agreement.jsonl for
+    threshold tuning.
+    """
+
+    def __init__(self, threshold=None, shadow_rate=None):
+        self.threshold = threshold if threshold is not None else float(os.environ.get("RULES_CONFIDENCE_THRESHOLD", "0.85"))
+        self.shadow_rate = shadow_rate if shadow_rate is not None else float(os.environ.get("RULES_SHADOW_RATE", "0.05"))
+        self.enabled = os.environ.get("RULES_ENABLED", "true").lower() == "true"
+        self.log_path = cache_path("rule_agreement.jsonl")
+        self._log = open(self.log_path, 'a', encoding='utf-8')
+        self.decided = 0
+        self.deferred = 0
+        self.compared = 0
+        self.agreed = 0
+        self.by_bucket = Counter()
+        self.agree_by_bucket = Counter()
+
+    def classify(self, text):
+        return classify(text) if self.enabled else {"status": None, "confidence": 0.0, "evidence": None}
+
+    def is_confident(self, verdict):
+        """True when the rule verdict should be used as-is (shadow samples return False)."""
+        if verdict["status"] is None or verdict["confidence"] < self.threshold:
+            self.deferred += 1
+            return False
+        if random.random() < self.shadow_rate:
+            self.deferred += 1
+            return False
+        self.decided += 1
+        return True
+
+    def to_result(self, verdict, text, previous=None, name=None):
+        """Builds an analyze_clinic_status-shaped result, keeping descriptive fields from the last LLM verdict."""
+        result = dict(previous or {})
+        result.update({
+            "status": verdict["status"],
+            "reason": f"Rule match (confidence {verdict['confidence']:.2f})",
+            "evidence": verdict["evidence"],
+            "source": "rules",
+        })
+        result.setdefault("clinic_name", name or "Unknown Clinic")
+        if not previous:
+            result["languages"] = detect_languages(text)
+        return result
+
+    def record_agreement(self, clinic_key, verdict, llm_result):
+        """Compares a rule verdict against the LLM's for the same text."""
+        llm_status = llm_result.get("status")
+        if verdict["status"] is None or llm_status in (None, "ERROR"):
+            return
+        bucket = min(int(verdict["confidence"] * 10), 9) / 10
+        agreed = verdict["status"] == llm_status
+        self.compared += 1
+        self.agreed += agreed
+        self.by_bucket[bucket] += 1
+        self.agree_by_bucket[bucket] += agreed
+        self._log.write(json.dumps({
+            "clinic": clinic_key,
+            "rule_status": verdict["status"],
+            "confidence": verdict["confidence"],
+            "llm_status": llm_status,
+            "evidence": verdict["evidence"],
+        }) + "\n")
+        self._log.flush()
+
+    def close(self):
+        self._log.close()
+
+    def stats(self):
+        return {
+            "threshold": self.threshold,
+            "decided": self.decided,
+            "deferred": self.deferred,
+            "compared": self.compared,
+            "agreement": self.agreed / self.compared if self.compared else None,
+            "agreement_by_confidence": {
+                b: round(self.agree_by_bucket[b] / self.by_bucket[b], 2) for b in sorted(self.by_bucket)
+            },
+        }
+
+    def print_stats(self):
+        s = self.stats()
+        agreement = f"{s['agreement']:.0%}" if s['agreement'] is not None else "n/a"
+        print(f"📏 Rules (threshold {s['threshold']}): decided {s['decided']}, deferred {s['deferred']} to Gemini "
+              f"| agreement with Gemini: {agreement} over {s['compared']}")
+        if s['agreement_by_confidence']:
+            buckets = ", ".join(f"≥{b:.1f}: {a:.0%}" for b, a in s['agreement_by_confidence'].items())
+            print(f"   By confidence: {buckets} (log: {self.log_path})")
@@ -0,0 +1,58 @@
+import json
+import os
+import time
+from datetime import datetime
+
+from cache_store import cache_path
+
+
+class RunJournal:
+    """
+    Append-only log of the clinics a run has finished, one JSON line per clinic.
+
+    Each line is flushed and fsynced as the clinic completes, so a crashed or
+    killed run can be resumed with `--resume <run-id>`: clinics already in the
+    journal are skipped and replayed into the new outputs. A torn last
+    line (killed mid-write) is ignored on load.
+    """
+
+    def __init__(self, run_id=None):
+        self.resumed = run_id is not None
+        self.run_id = run_id or datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.path = cache_path(os.path.join("runs", f"{self.run_id}.jsonl"))
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if self.resumed and not os.path.exists(self.path):
+            raise FileNotFoundError(f"No journal for run {self.run_id} at {self.path}")
+        self._file = open(self.path, 'a', encoding='utf-8')
+        if self._file.tell() and not self._ends_with_newline():
+            self._file.write("\n")  # Start after a torn line instead of extending it
+        self.recorded = 0
+
+    def _ends_with_newline(self):
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def entries(self):
+        """Yields (url, result) for every clinic in the journal, in completion order."""
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                yield entry['url'], entry['result']
+
+    def record(self, job):
+        """Appends a finished job's verdict."""
+        self._file.write(json.dumps({
+            "url": job['url'],
+            "result": job.get('result'),
+            "completed_at": time.time(),
+        }, default=str) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.recorded += 1
+
+    def close(self):
+        self._file.close()
@@ -0,0 +1,76 @@
+import asyncio
+import os
+import time
+from collections import defaultdict
+from urllib.parse import urlparse
+
+
+def host_key(url):
+    """Groups URLs by host so www.example.com and example.com share one politeness slot."""
+    host = urlparse(url).netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+class CrawlScheduler:
+    """
+    Runs one coroutine per clinic under a global concurrency cap and a per-host cap.
+
+    Results are returned in seed order regardless of completion order, so the
+    run output stays deterministic.
+    """
+
+    def __init__(self, concurrency=None, per_host=None):
+        self.concurrency = concurrency or int(os.environ.get("CRAWL_CONCURRENCY", "8"))
+        self.per_host = per_host or int(os.environ.get("CRAWL_PER_HOST", "2"))
+        self._global = asyncio.Semaphore(self.concurrency)
+        self._hosts = defaultdict(lambda: asyncio.Semaphore(self.per_host))
+        self._in_flight = 0
+        self.peak_in_flight = 0
+        self.host_wait_seconds = 0.0
+        self.completed = 0
+        self.failed = 0
+        self.elapsed = 0.0
+
+    async def _run_one(self, target, worker):
+        # Take the host slot first so a busy host doesn't hold global slots while it waits
+        wait_started = time.monotonic()
+        async with self._hosts[host_key(target['url'])]:
+            self.host_wait_seconds += time.monotonic() - wait_started
+            async with self._global:
+                self._in_flight += 1
+                self.peak_in_flight = max(self.peak_in_flight, self._in_flight)
+                try:
+                    return await worker(target)
+                except Exception as e:
+                    self.failed += 1
+                    print(f"  ❌ Worker error for {target['url']}: {e}")
+                    return None
+                finally:
+                    self._in_flight -= 1
+                    self.completed += 1
+
+    async def run(self, targets, worker):
+        """Returns [(target, worker_result), ...] in the same order as `targets`."""
+        started = time.monotonic()
+        outputs = await asyncio.gather(*(self._run_one(t, worker) for t in targets))
+        self.elapsed = time.monotonic() - started
+        return list(zip(targets, outputs))
+
+    def stats(self):
+        return {
+            "concurrency": self.concurrency,
+            "per_host": self.per_host,
+            "hosts": len(self._hosts),
+            "completed": self.completed,
+            "failed": self.failed,
+            "peak_in_flight": self.peak_in_flight,
+            "host_wait_seconds": round(self.host_wait_seconds, 2),
+            "elapsed_seconds": round(self.elapsed, 2),
+        }
+
+    def print_stats(self):
+        s = self.stats()
+        print(f"🚦 Scheduler: concurrency={s['concurrency']} per-host={s['per_host']} "
+              f"across {s['hosts']} host(s) | peak in flight: {s['peak_in_flight']}")
+        print(f"   Completed: {s['completed']} ({s['failed']} worker errors) in {s['elapsed_seconds']}s "
+              f"| Host wait: {s['host_wait_seconds']}s")
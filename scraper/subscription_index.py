@@ -0,0 +1,119 @@
+import asyncio
+import time
+
+# Area selections that match a clinic anywhere
+WILDCARD_AREAS = ('ontario wide', 'all locations')
+
+
+class SubscriptionIndex:
+    """
+    Inverted index of premium users' alert preferences, so a status flip finds
+    its recipients without re-reading and re-scanning every premium user.
+
+    Built once per run (on the first flip) from `store.users.premium()`:
+    lowercased area → user ids, lowercased language → user ids, plus the users
+    with a wildcard area ("Ontario wide"/"All locations") and the users without
+    language preferences. `recipients()` applies the same substring matching as
+    the per-user loop it replaces, but over the distinct area/language keys,
+    then intersects the id sets. Only users with a phone number are indexed.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.users = {}  # user_id -> phone
+        self.rank = {}  # user_id -> position in the premium-user stream
+        self.by_area = {}
+        self.by_language = {}
+        self.wildcard = set()
+        self.with_areas = set()
+        self.any_language = set()
+        self._location_cache = {}
+        self._lock = asyncio.Lock()
+        self.loaded = False
+
+        self.load_seconds = 0.0
+        self.lookups = 0
+        self.match_seconds = 0.0
+        self.matched = 0
+
+    def add(self, user_id, user_data):
+        """Indexes one premium user's preferences."""
+        phone = user_data.get('phoneNumber')
+        if not phone:
+            return
+        self.users[user_id] = phone
+        self.rank.setdefault(user_id, len(self.rank))
+        areas = [str(a).lower() for a in user_data.get('areas') or []]
+        for area in areas:
+            self.by_area.setdefault(area, set()).add(user_id)
+            if any(w in area for w in WILDCARD_AREAS):
+                self.wildcard.add(user_id)
+        if areas:
+            self.with_areas.add(user_id)
+        languages = [str(l).lower() for l in user_data.get('languages') or []]
+        for language in languages:
+            self.by_language.setdefault(language, set()).add(user_id)
+        if not languages:
+            self.any_language.add(user_id)
+
+    async def load(self):
+        """Reads every premium user once; concurrent callers wait for the same load."""
+        async with self._lock:
+            if self.loaded:
+                return self
+            started = time.monotonic()
+            async for user_id, user_data in self.store.users.premium():
+                self.add(user_id, user_data)
+            self.loaded = True
+            self.load_seconds = time.monotonic() - started
+        return self
+
+    def _location_matches(self, city):
+        if city not in self._location_cache:
+            if 'ontario wide' in city:
+                # An Ontario-wide clinic matches every user with an area
+                users = self.with_areas
+            else:
+                users = set(self.wildcard)
+                for area, ids in self.by_area.items():
+                    if area == city or city in area or area in city:
+                        users |= ids
+            self._location_cache[city] = users
+        return self._location_cache[city]
+
+    def _language_matches(self, clinic_languages):
+        languages = [str(l).lower() for l in clinic_languages]
+        users = set(self.any_language)
+        for language, ids in self.by_language.items():
+            if any(language in clinic_lang for clinic_lang in languages):
+                users |= ids
+        return users
+
+    def recipients(self, clinic_city, clinic_languages):
+        """Returns [(user_id, phone)] of the users to alert, in the order they were indexed."""
+        started = time.perf_counter()
+        users = self._location_matches((clinic_city or '').lower())
+        if clinic_languages:
+            users = users & self._language_matches(clinic_languages)
+        matched = [(user_id, self.users[user_id]) for user_id in sorted(users, key=self.rank.__getitem__)]
+        self.lookups += 1
+        self.matched += len(matched)
+        self.match_seconds += time.perf_counter() - started
+        return matched
+
+    def stats(self):
+        return {
+            "users": len(self.users),
+            "areas": len(self.by_area),
+            "languages": len(self.by_language),
+            "load_seconds": round(self.load_seconds, 2),
+            "lookups": self.lookups,
+            "matched": self.matched,
+            "avg_match_ms": 1000 * self.match_seconds / self.lookups if self.lookups else 0.0,
+        }
+
+    def print_stats(self):
+        s = self.stats()
+        print(f"🔔 Subscription index: {s['users']} user(s), {s['areas']} area(s), {s['languages']} language(s) "
+              f"loaded in {s['load_seconds']}s | {s['lookups']} flip(s) matched {s['matched']} recipient(s), "
+              f"avg {s['avg_match_ms']:.2f} ms")
@@ -0,0 +1,133 @@
+import os
+import re
+
+PAGE_HEADER = re.compile(r'^=== (MAIN PAGE|SUB-PAGE) \((.*)\) ===$', re.MULTILINE)
+
+# Language mentions (also protected from the boilerplate filter)
+LANGUAGE_PATTERNS = [
+    (re.compile(r'\b(?:english|french|français|mandarin|cantonese|spanish|arabic|punjabi|urdu|hindi|tamil|'
+                r'portuguese|italian|farsi|persian|korean|russian|tagalog|vietnamese|polish|gujarati)\b', re.I), 4),
+    (re.compile(r'languages?|we speak|spoken|langues', re.I), 3),
+]
+
+# (pattern, weight) – status phrases dominate, contact details keep name/address/phone extractable
+STATUS_PATTERNS = [
+    (re.compile(r'(?:not|no longer|aren\'t|are not|is not|isn\'t)\s+(?:currently\s+)?(?:accepting|taking)', re.I), 10),
+    (re.compile(r'accepting|taking on|now registering|register(?:ing)? (?:now|today)', re.I), 8),
+    (re.compile(r'new patients?|new clients?|nouveaux patients|nouveaux clients', re.I), 8),
+    (re.compile(r'wait\s?-?list|waiting list|liste d\'attente', re.I), 8),
+    (re.compile(r'roster|orphan(?:ed)? patients|health care connect|family doctor|médecin de famille', re.I), 5),
+    (re.compile(r'full capacity|at capacity|practice is full|not taking|closed to new', re.I), 9),
+    *LANGUAGE_PATTERNS,
+    (re.compile(r'\b[A-Z]\d[A-Z]\s?\d[A-Z]\d\b'), 3),  # Canadian postal code
+    (re.compile(r'\(?\d{3}\)?[\s.-]\d{3}[\s.-]\d{4}'), 3),  # Phone number
+]
+
+# Sub-pages that explicitly talk about intake get a boost (mirrors the prompt's priority rule)
+PRIORITY_URL = re.compile(r'new-?patient|register|registration|accepting|intake', re.I)
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token for English prose)."""
+    return len(text) // 4
+
+
+def split_pages(combined_text):
+    """Splits crawl output into [(header_line, [lines])] preserving page order."""
+    pages = []
+    matches = list(PAGE_HEADER.finditer(combined_text))
+    if not matches:
+        return [("", combined_text.splitlines())]
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(combined_text)
+        body = combined_text[match.end():end]
+        pages.append((match.group(0), [line for line in body.splitlines() if line.strip()]))
+    return pages
+
+
+class TextReducer:
+    """
+    Packs the highest-value line windows from every crawled page into a token budget.
+
+    Each line is scored by status/contact phrase hits; a window of `context_lines`
+    around each scored line is kept. Windows are taken best-first until the budget
+    (LLM_TOKEN_BUDGET) is spent, then emitted in original page order so the
+    "New Patients" sub-page can't be cut off by a long main page.
+    """
+
+    def __init__(self, token_budget=None, context_lines=2, header_lines=3):
+        self.token_budget = token_budget or int(os.environ.get("LLM_TOKEN_BUDGET", "1500"))
+        self.context_lines = context_lines
+        self.header_lines = header_lines
+        self.tokens_before = 0
+        self.tokens_after = 0
+        self.reduced = 0
+
+    def reduce(self, combined_text):
+        before = estimate_tokens(combined_text)
+        if before <= self.token_budget:
+            self._record(before, before)
+            return combined_text
+
+        pages = split_pages(combined_text)
+        candidates = []  # (score, page_index, start, end)
+        for p_index, (header, lines) in enumerate(pages):
+            boost = 1.5 if PRIORITY_URL.search(header) else 1.0
+            # The first lines of the main page usually carry the clinic name
+            if p_index == 0 and lines:
+                candidates.append((1000.0, p_index, 0, min(self.header_lines, len(lines))))
+            for l_index, line in enumerate(lines):
+                score = sum(weight for pattern, weight in STATUS_PATTERNS if pattern.search(line))
+                if score:
+                    start = max(0, l_index - self.context_lines)
+                    end = min(len(lines), l_index + self.context_lines + 1)
+                    candidates.append((score * boost, p_index, start, end))
+
+        candidates.sort(key=lambda c: -c[0])
+        selected = {i: set() for i in range(len(pages))}
+        budget = self.token_budget
+        for _score, p_index, start, end in candidates:
+            new_lines = [i for i in range(start, end) if i not in selected[p_index]]
+            cost = sum(estimate_tokens(pages[p_index][1][i]) + 1 for i in new_lines)
+            if cost > budget:
+                continue
+            selected[p_index].update(new_lines)
+            budget -= cost
+            if budget <= 0:
+                break
+
+        out = []
+        for p_index, (header, lines) in enumerate(pages):
+            keep = sorted(selected[p_index])
+            if not keep:
+                continue
+            out.append(header)
+            previous = None
+            for i in keep:
+                if previous is not None and i != previous + 1:
+                    out.append("…")
+                out.append(lines[i])
+                previous = i
+        reduced = "\n".join(out)
+        self._record(before, estimate_tokens(reduced))
+        return reduced
+
+    def _record(self, before, after):
+        self.tokens_before += before
+        self.tokens_after += after
+        if after < before:
+            self.reduced += 1
+
+    def stats(self):
+        return {
+            "token_budget": self.token_budget,
+            "reduced": self.reduced,
+            "tokens_before": self.tokens_before,
+            "tokens_after": self.tokens_after,
+            "ratio": self.tokens_after / self.tokens_before if self.tokens_before else 1.0,
+        }
+
+    def print_stats(self):
+        s = self.stats()
+        print(f"✂️  Text reduction: {s['tokens_before']} → {s['tokens_after']} est. tokens "
+              f"({s['ratio']:.0%}, {s['reduced']} clinic(s) trimmed to ≤{s['token_budget']})")
@@ -0,0 +1,169 @@
+import json
+import re
+
+STATUSES = ["OPEN", "CLOSED", "WAITLIST", "UNCERTAIN"]
+
+# Gemini response_schema (OpenAPI subset) for one clinic verdict
+VERDICT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "clinic_name": {"type": "string"},
+        "address": {"type": "string"},
+        "district": {"type": "string"},
+        "phone_number": {"type": "string"},
+        "remaining_vacancy": {"type": "string"},
+        "languages": {"type": "array", "items": {"type": "string"}},
+        "status": {"type": "string", "enum": STATUSES},
+        "reason": {"type": "string"},
+        "evidence": {"type": "string"},
+    },
+    "required": ["status", "reason", "evidence", "languages"],
+}
+
+BATCH_VERDICT_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {"clinic_id": {"type": "string"}, **VERDICT_SCHEMA["properties"]},
+        "required": ["clinic_id"] + VERDICT_SCHEMA["required"],
+    },
+}
+
+# Defaults used to fill in missing string fields (same placeholders Firestore writes use)
+_STRING_DEFAULTS = {
+    "clinic_name": "Unknown Clinic",
+    "address": "N/A",
+    "district": "N/A",
+    "phone_number": "N/A",
+    "remaining_vacancy": "Unknown",
+    "reason": "N/A",
+    "evidence": "N/A",
+}
+
+_STATUS_ALIASES = {
+    "ACCEPTING": "OPEN",
+    "ACCEPTING NEW PATIENTS": "OPEN",
+    "NOT ACCEPTING": "CLOSED",
+    "FULL": "CLOSED",
+    "WAIT LIST": "WAITLIST",
+    "WAITING LIST": "WAITLIST",
+    "WAIT-LIST": "WAITLIST",
+    "UNKNOWN": "UNCERTAIN",
+    "UNCLEAR": "UNCERTAIN",
+}
+
+_LANGUAGE_SPLIT = re.compile(r',|/|;|\band\b', re.IGNORECASE)
+
+
+class VerdictError(ValueError):
+    """A model response that can't be repaired locally."""
+
+
+def parse_json_response(response_text):
+    """Strips markdown fences from a model response and parses the JSON inside."""
+    # Clean up response to ensure it's valid JSON
+    response_text = response_text.strip()
+    if response_text.startswith("```json"):
+        response_text = response_text[7:-3]
+    elif response_text.startswith("```"):
+        response_text = response_text[3:-3]
+    return json.loads(response_text)
+
+
+def repair_verdict(obj):
+    """
+    Validates one verdict against VERDICT_SCHEMA, fixing what can be fixed locally.
+    Returns (verdict, repaired_fields); raises VerdictError when the status is unusable.
+    """
+    if isinstance(obj, list) and len(obj) == 1:
+        obj = obj[0]
+    if not isinstance(obj, dict):
+        raise VerdictError(f"expected a JSON object, got {type(obj).__name__}")
+
+    verdict = dict(obj)
+    repaired = []
+
+    status = verdict.get("status")
+    if not isinstance(status, str):
+        raise VerdictError("missing status")
+    canonical = status.strip().upper().replace("_", " ")
+    canonical = _STATUS_ALIASES.get(canonical, canonical)
+    if canonical not in STATUSES:
+        raise VerdictError(f"invalid status {status!r}")
+    if canonical != status:
+        repaired.append("status")
+    verdict["status"] = canonical
+
+    languages = verdict.get("languages")
+    if isinstance(languages, str):
+        languages = [l.strip() for l in _LANGUAGE_SPLIT.split(languages)]
+        repaired.append("languages")
+    elif not isinstance(languages, list):
+        languages = []
+        repaired.append("languages")
+    languages = [str(l).strip() for l in languages if l and str(l).strip()]
+    verdict["languages"] = languages or ["English"]
+
+    for field, default in _STRING_DEFAULTS.items():
+        value = verdict.get(field)
+        if value is None or value == "":
+            verdict[field] = default
+            repaired.append(field)
+        elif not isinstance(value, str):
+            verdict[field] = str(value)
+            repaired.append(field)
+
+    return verdict, repaired
+
+
+def build_reask_prompt(original_prompt, bad_response, error):
+    """Targeted retry: the original request plus what was wrong with the first answer."""
+    return (
+        f"{original_prompt}\n\n"
+        f"Your previous answer could not be used ({error}):\n{bad_response[:2000]}\n\n"
+        f"Answer again with ONLY a JSON object matching the requested format. "
+        f'"status" must be exactly one of {", ".join(STATUSES)}.'
+    )
+
+
+class VerdictValidator:
+    """Counts how model outputs fared: valid, repaired locally, re-asked, or failed."""
+
+    def __init__(self):
+        self.responses = 0
+        self.valid = 0
+        self.repaired = 0
+        self.reasked = 0
+        self.recovered = 0
+        self.failed = 0
+
+    def check(self, response_text):
+        """Returns (verdict, None) or (None, error message)."""
+        self.responses += 1
+        try:
+            verdict, repaired = repair_verdict(parse_json_response(response_text))
+        except (ValueError, VerdictError) as e:
+            return None, str(e)
+        if repaired:
+            self.repaired += 1
+        else:
+            self.valid += 1
+        return verdict, None
+
+    def stats(self):
+        analyses = self.responses - self.reasked
+        return {
+            "analyses": analyses,
+            "valid": self.valid,
+            "repaired": self.repaired,
+            "reasked": self.reasked,
+            "recovered": self.recovered,
+            "failed": self.failed,
+            "failure_rate": self.failed / analyses if analyses else 0.0,
+        }
+
+    def print_stats(self):
+        s = self.stats()
+        print(f"🧾 Verdict parsing: {s['valid']} valid, {s['repaired']} repaired locally, "
+              f"{s['reasked']} re-asked ({s['recovered']} recovered), {s['failed']} failed "
+              f"({s['failure_rate']:.1%} parse-failure rate)")
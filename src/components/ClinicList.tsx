@@ -40,6 +40,8 @@ export default function ClinicList({ paymentUrl, isPremium = false, onLastChecke
     const [userVotes, setUserVotes] = useState<Record<string, 'success' | 'failure'>>({});
     const [availableLanguages, setAvailableLanguages] = useState<string[]>([]);
     const [availableLocations, setAvailableLocations] = useState<Record<string, string[]>>({});
+    const [latestUpdate, setLatestUpdate] = useState<Date | null>(null);
+    const [lastRun, setLastRun] = useState<Date | null>(null);
 
     useEffect(() => {
         const storedVotes = localStorage.getItem("clinic_votes");
@@ -106,7 +108,7 @@ export default function ClinicList({ paymentUrl, isPremium = false, onLastChecke
                 }, validClinics[0].updatedAt);
 
                 const mostRecentDate = mostRecent?.toDate ? mostRecent.toDate() : new Date(mostRecent);
-                onLastCheckedUpdate(mostRecentDate);
+                setLatestUpdate(mostRecentDate);
             }
 
             setClinics(validClinics);
@@ -157,6 +159,27 @@ export default function ClinicList({ paymentUrl, isPremium = false, onLastChecke
         };
     }, []);
 
+    // Clinic docs only change when their verdict does; the scraper stamps each run on clinicChecks/latest
+    useEffect(() => {
+        if (!onLastCheckedUpdate) return;
+        const unsubscribe = onSnapshot(doc(db, "clinicChecks", "latest"), (snapshot) => {
+            const lastChecked = snapshot.data()?.lastChecked;
+            if (lastChecked?.toDate) setLastRun(lastChecked.toDate());
+        }, (error) => {
+            // Fall back to the most recent clinic update
+            console.error("Error fetching last run:", error);
+        });
+        return () => unsubscribe();
+    }, [onLastCheckedUpdate]);
+
+    useEffect(() => {
+        if (!onLastCheckedUpdate) return;
+        const dates = [latestUpdate, lastRun].filter((d): d is Date => d !== null);
+        if (dates.length > 0) {
+            onLastCheckedUpdate(new Date(Math.max(...dates.map(d => d.getTime()))));
+        }
+    }, [latestUpdate, lastRun, onLastCheckedUpdate]);
+
     useEffect(() => {
         let result = [...clinics];
 
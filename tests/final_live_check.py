@@ -7,13 +7,13 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import scraper functions
 # This will also initialize Firebase and Notifier
-from scraper.main import update_clinic_in_firestore, send_alert_batch, db
+from scraper.main import update_clinic_in_firestore, send_alert_batch, store
 
 async def run_test():
     print("🚀 Starting Final Live Fire Test...")
     
-    if not db:
-        print("❌ Database not initialized. Check serviceAccountKey.json")
+    if not store:
+        print("❌ Data store not initialized. Check serviceAccountKey.json or DATASTORE_BACKEND")
         return
 
     # 1. Define Test Target
@@ -26,8 +26,7 @@ async def run_test():
     
     # 2. Force Flip: Set to WAITLIST
     print(f"\n📝 Setting {test_url} to WAITLIST in Firestore...")
-    doc_ref = db.collection('clinics').document(test_id)
-    doc_ref.set({
+    await store.clinics.set(test_id, {
         'status': 'WAITLIST',
         'district': 'Toronto',
         'province': 'ON',
@@ -35,11 +34,11 @@ async def run_test():
         'url': test_url,
         'name': 'Appletree Medical Group',
         'updatedAt': '2024-01-01T00:00:00Z' # Old timestamp
-    }, merge=True)
+    })
     
     # Verify it's set
-    doc = doc_ref.get()
-    print(f"   Current Status in DB: {doc.to_dict().get('status')}")
+    doc = await store.clinics.get(test_id)
+    print(f"   Current Status in DB: {doc.get('status')}")
     
     # 3. Simulate Analysis finding it OPEN
     print("\n🧠 Simulating Analysis finding it OPEN...")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Regression tests for the cross-clinic boilerplate filter (scraper/boilerplate.py).
+
+A shared directory host repeats its label lines ("Accepting new patients:",
+"Languages:") on every clinic page, but the values under them are per-clinic
+facts that must survive. Runs offline: pytest tests/test_boilerplate.py
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scraper'))
+
+import cache_store
+from boilerplate import BoilerplateFilter
+
+NAV = "Home | Find a Clinic | About the Mosaic Primary Care Network | Contact Us"
+FOOTER = "Mosaic Primary Care Network supports family physicians across Surrey and North Delta"
+
+
+def directory_page(name, accepting, languages):
+    return "\n".join([
+        "=== MAIN PAGE (https://mosaicpcn.ca/clinics/{}) ===".format(name.lower().replace(" ", "-")),
+        NAV,
+        name,
+        "Accepting new patients:",
+        accepting,
+        f"Languages: {languages}",
+        f"{name}, 100 King George Blvd, Surrey",
+        FOOTER,
+    ])
+
+
+def run_directory_host(cache_dir):
+    previous_dir, cache_store.CACHE_DIR = cache_store.CACHE_DIR, cache_dir
+    try:
+        return _run_directory_host()
+    finally:
+        cache_store.CACHE_DIR = previous_dir
+
+
+def _run_directory_host():
+    # Earlier run: three clinics of the same directory host
+    seen = BoilerplateFilter(filename="boilerplate_test.sqlite3")
+    for i, name in enumerate(["Alpha Clinic", "Beta Clinic", "Gamma Clinic"]):
+        seen.strip(directory_page(name, "No", "English, Punjabi"), f"https://mosaicpcn.ca/c{i}", f"c{i}")
+    seen.close()
+
+    # This run: a fourth clinic with the same values
+    boilerplate = BoilerplateFilter(filename="boilerplate_test.sqlite3")
+    stripped = boilerplate.strip(directory_page("Delta Clinic", "No", "English, Punjabi"),
+                                 "https://mosaicpcn.ca/c3", "c3")
+    boilerplate.close()
+    return stripped.splitlines()
+
+
+def test_directory_host_keeps_per_clinic_facts():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        lines = run_directory_host(cache_dir)
+    assert "Accepting new patients:" in lines
+    assert "No" in lines
+    assert "Languages: English, Punjabi" in lines
+    assert "Delta Clinic" in lines
+
+
+def test_directory_host_still_drops_long_repeated_chrome():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        lines = run_directory_host(cache_dir)
+    assert NAV not in lines
+    assert FOOTER not in lines
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
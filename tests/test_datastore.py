@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Parity tests for the offline data store backends (scraper/datastore.py).
+
+Benchmarks and offline runs use MemoryStore or SqliteStore in place of
+Firestore, so both must give the same answers for the operations the scraper
+relies on: merge-sets, query operators, projected scans and the nested
+per-clinic maps of the clinicChecks shards.
+Runs offline: python tests/test_datastore.py (or pytest tests/test_datastore.py)
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scraper'))
+
+from datastore import MemoryStore, SqliteStore
+from firestore_writer import FirestoreWriter
+
+
+def on_both_backends(scenario):
+    """Runs the async `scenario(store)` on a fresh MemoryStore and SqliteStore; returns both results."""
+    async def run(store):
+        try:
+            return await scenario(store)
+        finally:
+            await store.close()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        return (asyncio.run(run(MemoryStore())),
+                asyncio.run(run(SqliteStore(os.path.join(tmp, "store.sqlite3")))))
+
+
+def test_set_merges_nested_maps_and_replaces_without_merge():
+    async def scenario(store):
+        await store.set('clinics', 'c1', {"name": "A", "hours": {"mon": "9-5"}, "languages": ["English"]})
+        await store.set('clinics', 'c1', {"hours": {"tue": "9-5"}, "languages": ["French"]})
+        merged = await store.get('clinics', 'c1')
+        await store.set('clinics', 'c1', {"name": "B"}, merge=False)
+        return merged, await store.get('clinics', 'c1'), await store.get('clinics', 'missing')
+
+    memory, sqlite = on_both_backends(scenario)
+    assert memory == sqlite
+    merged, replaced, missing = memory
+    assert merged == {"name": "A", "hours": {"mon": "9-5", "tue": "9-5"}, "languages": ["French"]}
+    assert replaced == {"name": "B"}
+    assert missing is None
+
+
+def test_update_requires_an_existing_doc():
+    async def scenario(store):
+        await store.set('users', 'u1', {"isPremium": False})
+        await store.update('users', 'u1', {"isPremium": True})
+        try:
+            await store.update('users', 'u2', {"isPremium": True})
+        except KeyError:
+            return await store.get('users', 'u1'), "KeyError"
+        return await store.get('users', 'u1'), None
+
+    memory, sqlite = on_both_backends(scenario)
+    assert memory == sqlite == ({"isPremium": True}, "KeyError")
+
+
+def test_query_operators_match_on_both_backends():
+    users = {
+        "u1": {"isPremium": True, "email": "a@x.ca", "credits": 5, "areas": ["Toronto", "Ottawa"]},
+        "u2": {"isPremium": False, "email": "b@x.ca", "credits": 0, "areas": []},
+        "u3": {"isPremium": True, "email": "c@x.ca", "areas": ["Kingston"]},  # No credits field
+    }
+    wheres = [
+        [("isPremium", "==", True)],
+        [("isPremium", "!=", True)],
+        [("credits", "<", 5)],
+        [("credits", "<=", 5)],
+        [("credits", ">", 0)],
+        [("credits", ">=", 0)],
+        [("email", "in", ["a@x.ca", "c@x.ca"])],
+        [("areas", "array_contains", "Toronto")],
+        [("isPremium", "==", True), ("areas", "array_contains", "Kingston")],
+    ]
+
+    async def scenario(store):
+        for user_id, data in users.items():
+            await store.set('users', user_id, data)
+        found = [sorted([doc_id async for doc_id, _ in store.query('users', where=where)]) for where in wheres]
+        limited = [doc_id async for doc_id, _ in store.query('users', where=[("isPremium", "==", True)], limit=1)]
+        return found, len(limited), await store.users.find_by_email("b@x.ca")
+
+    memory, sqlite = on_both_backends(scenario)
+    assert memory == sqlite
+    found, limited, by_email = memory
+    assert found == [["u1", "u3"], ["u2"], ["u2"], ["u1", "u2"], ["u1"], ["u1", "u2"], ["u1", "u3"], ["u1"], ["u3"]]
+    assert limited == 1
+    assert by_email == ("u2", users["u2"])
+
+
+def test_scan_projects_to_the_requested_fields():
+    async def scenario(store):
+        await store.clinics.set('c1', {"status": "OPEN", "evidence": "Now accepting", "name": "A"})
+        await store.clinics.set('c2', {"status": "CLOSED", "name": "B"})
+        return sorted([(doc_id, data) async for doc_id, data in store.clinics.scan(fields=["status", "evidence"])])
+
+    memory, sqlite = on_both_backends(scenario)
+    assert memory == sqlite == [("c1", {"status": "OPEN", "evidence": "Now accepting"}), ("c2", {"status": "CLOSED"})]
+
+
+def test_clinic_check_shards_accumulate_per_clinic_maps():
+    # record_clinic_check writes {clinic_id: check} into a shard doc: each write must add to the map, not replace it
+    checked = datetime(2025, 5, 1, 9, 30, tzinfo=ZoneInfo("America/Toronto"))
+
+    async def scenario(store):
+        await store.set('clinicChecks', 'shard-01', {"c1": {"lastChecked": checked, "status": "OPEN"}})
+        await store.batch_set([
+            ('clinicChecks', 'shard-01', {"c2": {"lastChecked": checked, "status": "CLOSED"}}),
+            ('clinicChecks', 'shard-01', {"c1": {"fingerprint": "abc"}}),
+        ])
+        direct = await store.get('clinicChecks', 'shard-01')
+
+        # The same writes coalesced by the background writer
+        writer = FirestoreWriter(store, flush_seconds=0.01).start()
+        writer.set('clinicChecks', 'shard-02', {"c1": {"lastChecked": checked, "status": "OPEN"}})
+        writer.set('clinicChecks', 'shard-02', {"c2": {"lastChecked": checked, "status": "CLOSED"}})
+        writer.set('clinicChecks', 'shard-02', {"c1": {"fingerprint": "abc"}})
+        await writer.close()
+        return direct, await store.get('clinicChecks', 'shard-02')
+
+    memory, sqlite = on_both_backends(scenario)
+    assert memory == sqlite
+    direct, coalesced = memory
+    assert direct == coalesced == {
+        "c1": {"lastChecked": checked, "status": "OPEN", "fingerprint": "abc"},
+        "c2": {"lastChecked": checked, "status": "CLOSED"},
+    }
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
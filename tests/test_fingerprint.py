@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Regression tests for fingerprint normalization (scraper/fingerprint.py).
+
+A masked date that swallows ordinary words hides real page changes from the
+fingerprint gate, so clinics keep a stale verdict. Only month names count.
+Runs offline: python tests/test_fingerprint.py (or pytest tests/test_fingerprint.py)
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scraper'))
+
+from fingerprint import normalize_text
+
+
+def test_month_and_year_is_one_date():
+    assert normalize_text("Updated May 2025") == "updated <date>"
+    assert normalize_text("Closed until Sept. 3rd, 2024") == "closed until <date>"
+    assert normalize_text("12 March 2025 at 9:30 am") == "<date> at <time>"
+
+
+def test_words_starting_like_a_month_are_not_dates():
+    assert normalize_text("Market 12 Street") == "market 12 street"
+    assert normalize_text("Junior 3 doctors") == "junior 3 doctors"
+    assert normalize_text("Decision 5") == "decision 5"
+
+
+def test_changed_wording_changes_the_text():
+    assert normalize_text("Junior 3 doctors") != normalize_text("Junior 4 doctors")
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
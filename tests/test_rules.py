@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Regression tests for the local rule classifier (scraper/rules.py).
+
+Confident rule verdicts skip Gemini and an OPEN verdict goes straight to SMS
+alerts, so clinic-site wording the rules once got wrong is pinned here.
+Runs offline: python tests/test_rules.py (or pytest tests/test_rules.py)
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scraper'))
+
+from rules import classify
+
+THRESHOLD = 0.85  # RULES_CONFIDENCE_THRESHOLD default
+
+
+def confident_status(text):
+    verdict = classify(text)
+    return verdict["status"] if verdict["confidence"] >= THRESHOLD else None
+
+
+def test_faq_question_with_negative_answer_is_not_open():
+    assert confident_status("Are you accepting new patients?\nUnfortunately, we are not at this time.") is None
+
+
+def test_faq_question_about_a_doctor_is_not_open():
+    assert confident_status("Is Dr. Patel accepting new patients?\nNo. Her practice is closed.") is None
+
+
+def test_negation_in_an_earlier_clause_does_not_flip_to_closed():
+    assert classify("If you do not have a family doctor, we are accepting new patients.")["status"] == "OPEN"
+
+
+def test_bare_accepting_phrase_defers_to_gemini():
+    assert confident_status("We are accepting new patients.") is None
+
+
+def test_explicit_phrases_still_decide():
+    assert confident_status("We are now accepting new patients!") == "OPEN"
+    assert confident_status("We are not currently accepting new patients.") == "CLOSED"
+    assert confident_status("Sorry, we are no longer taking on new patients.") == "CLOSED"
+    assert confident_status("Our practice is full. Please join our waitlist.") == "WAITLIST"
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
@@ -5,16 +5,28 @@ This function receives Ko-fi payment notifications and:
 1. Verifies the webhook token
 2. Updates the user's premium status in Firestore
 3. Sends a confirmation SMS via Twilio (if configured)
+
+Firestore is accessed through the scraper's data-access layer (datastore.py),
+which deploy_webhook.sh copies next to this file.
 """
 
 import os
+import sys
 import json
+import asyncio
 from flask import Request, jsonify
 import functions_framework
 import firebase_admin
-from firebase_admin import credentials, firestore, initialize_app
+from firebase_admin import credentials, initialize_app
 from twilio.rest import Client
 
+try:
+    from datastore import open_datastore
+except ImportError:
+    # Running from a checkout: use the scraper's copy
+    sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scraper'))
+    from datastore import open_datastore
+
 # Initialize Firebase Admin SDK
 # In Cloud Functions, this uses Application Default Credentials automatically
 if not firebase_admin._apps:
@@ -31,8 +43,6 @@ if not firebase_admin._apps:
             print(f"Failed to initialize Firebase: {e}")
             raise
 
-db = firestore.client()
-
 # Twilio configuration (environment variables)
 TWILIO_ACCOUNT_SID = os.getenv('TWILIO_ACCOUNT_SID')
 TWILIO_AUTH_TOKEN = os.getenv('TWILIO_AUTH_TOKEN')
@@ -64,7 +74,21 @@ def kofi_handler(request: Request):
         return jsonify({'error': 'Invalid verification token'}), 403
     
     print(f"✅ Token verified successfully")
-    
+
+    # Each request runs its own event loop, so it opens (and closes) its own store
+    return asyncio.run(process_payment(data))
+
+
+async def process_payment(data):
+    """Upgrades the paying user and sends the welcome SMS; returns the HTTP response."""
+    store = open_datastore()
+    try:
+        return await _process_payment(store, data)
+    finally:
+        await store.close()
+
+
+async def _process_payment(store, data):
     # Extract payment details
     email = data.get('email')
     amount = data.get('amount')
@@ -93,20 +117,18 @@ def kofi_handler(request: Request):
     
     # Find user by email in Firestore
     print(f"🔍 Searching for user with email: {email}")
-    users_ref = db.collection('users')
-    query = users_ref.where('email', '==', email).limit(1)
     
     # Debug: Try to get all results
     try:
-        docs = list(query.stream())
-        print(f"📊 Query returned {len(docs)} result(s)")
+        found = await store.users.find_by_email(email)
+        print(f"📊 Query returned {1 if found else 0} result(s)")
         
-        if not docs:
+        if not found:
             # Debug: Try to list all users to see if collection is accessible
-            all_users = list(users_ref.limit(5).stream())
+            all_users = [u async for u in store.query('users', limit=5)]
             print(f"📊 Total users in collection (sample): {len(all_users)}")
             if all_users:
-                sample_emails = [u.to_dict().get('email', 'NO_EMAIL') for u in all_users]
+                sample_emails = [u.get('email', 'NO_EMAIL') for _, u in all_users]
                 print(f"📊 Sample emails: {sample_emails}")
             
             # No matching user – still return 200 so Ko-fi doesn't retry
@@ -116,9 +138,7 @@ def kofi_handler(request: Request):
         print(f"❌ Query error: {e}")
         return jsonify({'error': 'Database query failed'}), 500
     
-    user_doc = docs[0]
-    user_id = user_doc.id
-    user_ref = users_ref.document(user_id)
+    user_id, user_data = found
     
     print(f"✅ Found user: {user_id}")
     
@@ -135,9 +155,9 @@ def kofi_handler(request: Request):
             'tierName': tier_name,
             'messageId': message_id,
             'rawPayload': data,
-            'processedAt': firestore.SERVER_TIMESTAMP
+            'processedAt': store.server_timestamp()
         }
-        db.collection('transactions').add(transaction_data)
+        await store.transactions.add(transaction_data)
         print(f'✅ Transaction logged for user {user_id}')
     except Exception as e:
         print(f'❌ Failed to log transaction: {e}')
@@ -146,7 +166,7 @@ def kofi_handler(request: Request):
     try:
         update_data = {
             'isPremium': True,
-            'premiumSince': firestore.SERVER_TIMESTAMP,
+            'premiumSince': store.server_timestamp(),
             'lastPaymentAmount': amount,
             'lastPaymentDate': timestamp,
             'isSubscription': is_subscription,
@@ -155,14 +175,13 @@ def kofi_handler(request: Request):
         if tier_name:
             update_data['tierName'] = tier_name
         
-        user_ref.update(update_data)
+        await store.users.update(user_id, update_data)
         print(f'✅ User {user_id} upgraded to premium')
     except Exception as e:
         print(f'❌ Failed to update user: {e}')
         return jsonify({'error': 'Failed to update user'}), 500
     
     # Send SMS if Twilio is configured and user has a phone number
-    user_data = user_doc.to_dict()
     phone = user_data.get('phoneNumber')
     
     if phone and TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN:
@@ -179,12 +198,12 @@ def kofi_handler(request: Request):
             
             # Log notification to Firestore
             try:
-                db.collection('notifications').add({
+                await store.notifications.add({
                     'userId': user_id,
                     'phone': phone,
                     'type': 'WELCOME',
                     'sid': message.sid,
-                    'timestamp': firestore.SERVER_TIMESTAMP
+                    'timestamp': store.server_timestamp()
                 })
                 print(f'✅ Welcome SMS logged: {message.sid}')
             except Exception as e: